@@ -1 +1,2 @@
-from .resevit_road import ResEViT_road_cls
\ No newline at end of file
+from .resevit_road import ResEViT_road_cls
+from .fuse import fuse_for_inference, check_fusion
\ No newline at end of file
@@ -0,0 +1,78 @@
+import json
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
+
+__all__ = ["fit_temperature", "expected_calibration_error", "fit_class_thresholds", "top_k",
+           "save_calibration", "load_calibration"]
+
+
+def fit_temperature(logits: torch.Tensor, labels: torch.Tensor, max_iter: int = 100) -> float:
+    """Temperature ``T`` minimising the NLL of ``softmax(logits / T)`` on held-out logits (Guo et al., 2017)."""
+    logits, labels = logits.detach().float().cpu(), labels.detach().long().cpu()
+    # optimise log T so that T stays positive
+    log_t = torch.zeros(1, requires_grad=True)
+    optimizer = torch.optim.LBFGS([log_t], lr=0.1, max_iter=max_iter)
+
+    def closure():
+        optimizer.zero_grad()
+        loss = F.cross_entropy(logits / log_t.exp(), labels)
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return float(log_t.detach().exp())
+
+
+def expected_calibration_error(probs: torch.Tensor, labels: torch.Tensor, n_bins: int = 15) -> float:
+    """Mean gap between confidence and accuracy over ``n_bins`` confidence bins, weighted by bin size."""
+    confidence, preds = probs.max(dim=1)
+    correct = (preds == labels).float()
+    bins = torch.clamp((confidence * n_bins).long(), max=n_bins - 1)
+    ece = 0.0
+    for b in range(n_bins):
+        mask = bins == b
+        if mask.any():
+            ece += mask.float().mean().item() * abs(confidence[mask].mean().item() - correct[mask].mean().item())
+    return ece
+
+
+def fit_class_thresholds(probs: torch.Tensor, labels: torch.Tensor, classes, target_precision: float = 0.9) -> dict:
+    """Per class, the lowest confidence at which predictions of that class reach ``target_precision``.
+
+    Classes that never reach it get the confidence of their most confident
+    prediction, classes never predicted are left out.
+    """
+    confidence, preds = probs.max(dim=1)
+    thresholds = {}
+    for c in classes:
+        mask = preds == c
+        if not mask.any():
+            continue
+        conf, order = confidence[mask].sort(descending=True)
+        correct = (labels[mask][order] == c).float()
+        # precision of "predicted c with confidence >= conf[i]"
+        precision = correct.cumsum(0) / torch.arange(1, len(correct) + 1)
+        reached = (precision >= target_precision).nonzero()
+        thresholds[int(c)] = float(conf[reached[-1]]) if len(reached) else float(conf[0])
+    return thresholds
+
+
+def top_k(probs: torch.Tensor, k: int = 3) -> list:
+    """``[[class, probability], ...]`` of the ``k`` most likely classes of one frame."""
+    values, indices = probs.topk(min(k, probs.numel()))
+    return [[int(i), round(float(v), 4)] for v, i in zip(values, indices)]
+
+
+def save_calibration(path: str, temperature: float, class_thresholds: Optional[dict] = None, **info) -> None:
+    with open(path, "w") as f:
+        json.dump({"temperature": temperature, "class_thresholds": class_thresholds or {}, **info}, f, indent=2)
+
+
+def load_calibration(path: str) -> tuple:
+    """``(temperature, {class: threshold})``."""
+    with open(path) as f:
+        calibration = json.load(f)
+    thresholds = {int(c): float(t) for c, t in calibration.get("class_thresholds", {}).items()}
+    return float(calibration.get("temperature", 1.0)), thresholds
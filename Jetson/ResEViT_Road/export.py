@@ -0,0 +1,105 @@
+import inspect
+import io
+import os
+from typing import Optional
+
+import torch
+import torch.nn as nn
+
+__all__ = ["export_onnx", "export_torchscript"]
+
+# batch and spatial size of a single image input / logits output can change at runtime
+DYNAMIC_AXES = {
+    "input": {0: "batch", 2: "height", 3: "width"},
+    "output": {0: "batch"},
+}
+
+
+def export_onnx(
+    model: nn.Module,
+    export_path: str,
+    sample_inputs: any,
+    simplify=True,
+    opset=17,
+    dynamic_axes: Optional[dict] = DYNAMIC_AXES,
+    input_names=("input",),
+    output_names=("output",),
+) -> None:
+    """Export a model to a platform-specific onnx format.
+
+    Args:
+        model: a torch.nn.Module object.
+        export_path: export location.
+        sample_inputs: Any.
+        simplify: a flag to turn on onnx-simplifier (skipped with a warning if it is not installed)
+        opset: int
+        dynamic_axes: dynamic axes per input/output name, None for a fixed-shape graph
+        input_names: names of the graph inputs
+        output_names: names of the graph outputs
+    """
+    import onnx
+
+    model.eval()
+
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # the TorchScript-based exporter, which understands dynamic_axes
+        kwargs["dynamo"] = False
+
+    buffer = io.BytesIO()
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            sample_inputs,
+            buffer,
+            opset_version=opset,
+            input_names=list(input_names),
+            output_names=list(output_names),
+            dynamic_axes=dynamic_axes,
+            do_constant_folding=True,
+            **kwargs,
+        )
+        buffer.seek(0, 0)
+        if simplify:
+            try:
+                from onnxsim import simplify as simplify_func
+            except ImportError:
+                simplify_func = None
+                print("onnxsim is not installed, exporting without simplification")
+            if simplify_func is not None:
+                onnx_model = onnx.load_model(buffer)
+                onnx_model, success = simplify_func(onnx_model)
+                assert success
+                new_buffer = io.BytesIO()
+                onnx.save(onnx_model, new_buffer)
+                buffer = new_buffer
+                buffer.seek(0, 0)
+
+    if buffer.getbuffer().nbytes > 0:
+        save_dir = os.path.dirname(export_path)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        with open(export_path, "wb") as f:
+            f.write(buffer.read())
+
+
+
+def export_torchscript(model: nn.Module, export_path: str, sample_inputs: any, freeze: bool = True) -> torch.jit.ScriptModule:
+    """Trace ``model`` with ``sample_inputs`` and save the TorchScript module.
+
+    Tracing unrolls the Python loops over the stage ModuleLists and
+    OpSequential, and resolves shape-dependent branches (LiteMLA's
+    ``H * W > self.dim``) for the resolution of ``sample_inputs``. With
+    ``freeze`` the weights are inlined as constants. ``torch.jit.optimize_for_inference``
+    is left to load time, its output cannot always be serialized.
+    """
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, sample_inputs)
+        if freeze:
+            traced = torch.jit.freeze(traced)
+    save_dir = os.path.dirname(export_path)
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    traced.save(export_path)
+    return traced
@@ -0,0 +1,81 @@
+import copy
+
+import torch
+from torch import nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+from .layers.nn import Conv2d_BN
+
+__all__ = ["fuse_for_inference", "check_fusion"]
+
+# (conv, norm) attribute pairs whose forward applies the norm right after the conv:
+# ResNet_input (conv, bn), BasicBlock (conv1, bn1), (conv2, bn2),
+# ConvNormActivationBlock / EfficientViT ConvLayer (conv, norm), InverseResidualBlock (conv2, norm)
+CONV_BN_PAIRS = (("conv", "bn"), ("conv1", "bn1"), ("conv2", "bn2"), ("conv", "norm"), ("conv2", "norm"))
+
+
+def _fusable(conv, bn) -> bool:
+    return (
+        type(conv) is nn.Conv2d
+        and type(bn) is nn.BatchNorm2d
+        and bn.track_running_stats
+        and bn.num_features == conv.out_channels
+    )
+
+
+def _fuse_module(module: nn.Module) -> int:
+    count = 0
+    for name, child in list(module.named_children()):
+        if isinstance(child, Conv2d_BN):
+            setattr(module, name, child.fuse())
+            count += 1
+        else:
+            count += _fuse_module(child)
+
+    if isinstance(module, nn.Sequential):
+        # downsample branches and other plain Conv2d -> BatchNorm2d sequences
+        children = list(module._modules.items())
+        for (conv_name, conv), (bn_name, bn) in zip(children, children[1:]):
+            if _fusable(conv, bn):
+                module._modules[conv_name] = fuse_conv_bn_eval(conv, bn)
+                module._modules[bn_name] = nn.Identity()
+                count += 1
+        return count
+
+    for conv_name, bn_name in CONV_BN_PAIRS:
+        conv, bn = getattr(module, conv_name, None), getattr(module, bn_name, None)
+        if conv is not None and bn is not None and _fusable(conv, bn):
+            setattr(module, conv_name, fuse_conv_bn_eval(conv, bn))
+            setattr(module, bn_name, nn.Identity())
+            count += 1
+    return count
+
+
+@torch.no_grad()
+def fuse_for_inference(model: nn.Module, inplace: bool = False, verbose: bool = False) -> nn.Module:
+    """Fold every BatchNorm2d that directly follows a Conv2d into the conv weights.
+
+    Works on ResEViT_road_cls and on the baseline EfficientViT (and any model
+    built from the same blocks). The fused model is in eval mode and must
+    not be trained further: the BatchNorm layers are replaced by ``nn.Identity``.
+    """
+    if not inplace:
+        model = copy.deepcopy(model)
+    model.eval()
+    count = _fuse_module(model)
+    if verbose:
+        print(f"Fused {count} Conv+BN pairs")
+    return model
+
+
+@torch.no_grad()
+def check_fusion(model: nn.Module, fused: nn.Module, input_size=(1, 3, 224, 224), atol=1e-3, device=None) -> float:
+    """Compare the outputs of the unfused and fused models on a random input and return the max abs difference."""
+    device = device or next(model.parameters()).device
+    x = torch.randn(*input_size, device=device)
+    model.eval()
+    fused.eval()
+    diff = (model(x) - fused(x)).abs().max().item()
+    if diff > atol:
+        raise AssertionError(f"Fused model differs from the original: max abs diff {diff:.2e} > {atol:.0e}")
+    return diff
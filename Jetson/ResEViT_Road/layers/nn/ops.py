@@ -1,6 +1,6 @@
 import torch
 from torch import nn
-import itertools
+from functools import lru_cache
 
 
 class ConcatLayer(nn.Module):
@@ -52,6 +52,23 @@ class Conv2d_BN(torch.nn.Sequential):
         return m
 
 
+@lru_cache(maxsize=None)
+def attention_bias_idxs(H, W, resolution):
+    """``(H*W, H*W)`` index of the relative-position bias of every query/key pair.
+
+    The bias table of a ``resolution`` window has one entry per offset
+    ``(|dy|, |dx|)``, stored at ``|dy| * resolution + |dx|``; offsets beyond the
+    window (inputs larger than ``resolution``) reuse the bias of the farthest one.
+    Built once per shape and shared by every module (do not modify in place).
+    """
+    # explicit device: models built under a meta device context must not cache meta indices
+    ys, xs = torch.meshgrid(torch.arange(H, device="cpu"), torch.arange(W, device="cpu"), indexing="ij")
+    ys, xs = ys.flatten(), xs.flatten()
+    dy = (ys[:, None] - ys[None, :]).abs().clamp_(max=resolution - 1)
+    dx = (xs[:, None] - xs[None, :]).abs().clamp_(max=resolution - 1)
+    return dy * resolution + dx
+
+
 class CascadedGroupAttention(torch.nn.Module):
     r""" Cascaded Group Attention.
 
@@ -84,32 +101,47 @@ class CascadedGroupAttention(torch.nn.Module):
         self.proj = torch.nn.Sequential(torch.nn.ReLU(), Conv2d_BN(
             self.d * num_heads, dim, bn_weight_init=0, resolution=resolution))
 
-        points = list(itertools.product(range(resolution), range(resolution)))
-        N = len(points)
-        attention_offsets = {}
-        idxs = []
-        for p1 in points:
-            for p2 in points:
-                offset = (abs(p1[0] - p2[0]), abs(p1[1] - p2[1]))
-                if offset not in attention_offsets:
-                    attention_offsets[offset] = len(attention_offsets)
-                idxs.append(attention_offsets[offset])
+        self.resolution = resolution
         self.attention_biases = torch.nn.Parameter(
-            torch.zeros(num_heads, len(attention_offsets)))
+            torch.zeros(num_heads, resolution * resolution))
         self.register_buffer('attention_bias_idxs',
-                             torch.LongTensor(idxs).view(N, N))
+                             attention_bias_idxs(resolution, resolution, resolution))
+        # eval-mode biases per (H, W, device), rebuilt when attention_biases changes
+        self._ab_cache = {}
+        self._ab_version = None
 
     @torch.no_grad()
     def train(self, mode=True):
         super().train(mode)
-        if mode and hasattr(self, 'ab'):
-            del self.ab
-        else:
-            self.ab = self.attention_biases[:, self.attention_bias_idxs]
+        self._ab_cache.clear()
+        if not mode:
+            self._eval_bias(self.resolution, self.resolution, self.attention_biases.device)
+        return self
+
+    def _bias_idxs(self, H, W, device):
+        if H == W == self.resolution:
+            return self.attention_bias_idxs
+        return attention_bias_idxs(H, W, self.resolution).to(device)
+
+    @torch.no_grad()
+    def _eval_bias(self, H, W, device):
+        if self._ab_version != self.attention_biases._version:
+            # new weights were loaded after eval()
+            self._ab_cache.clear()
+            self._ab_version = self.attention_biases._version
+        key = (H, W, device)
+        ab = self._ab_cache.get(key)
+        if ab is None:
+            ab = self.attention_biases[:, self._bias_idxs(H, W, device)]
+            self._ab_cache[key] = ab
+        return ab
 
     def forward(self, x):  # x (B,C,H,W)
         B, C, H, W = x.shape
-        trainingab = self.attention_biases[:, self.attention_bias_idxs]
+        if self.training:
+            ab = self.attention_biases[:, self._bias_idxs(H, W, x.device)]
+        else:
+            ab = self._eval_bias(H, W, x.device)
         feats_in = x.chunk(len(self.qkvs), dim=1)
         feats_out = []
         feat = feats_in[0]
@@ -123,7 +155,7 @@ class CascadedGroupAttention(torch.nn.Module):
             attn = (
                 (q.transpose(-2, -1) @ k) * self.scale
                 +
-                (trainingab[i] if self.training else self.ab[i])
+                ab[i]
             )
             attn = attn.softmax(dim=-1) # BNN
             feat = (v @ attn.transpose(-2, -1)).view(B, self.d, H, W) # BCHW
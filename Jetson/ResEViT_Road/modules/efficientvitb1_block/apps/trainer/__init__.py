@@ -4,3 +4,4 @@
 
 from .base import *
 from .run_config import *
+from .early_exit import *
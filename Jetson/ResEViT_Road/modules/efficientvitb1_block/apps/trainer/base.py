@@ -12,6 +12,7 @@ from .run_config import RunConfig
 from ..utils import EMA, dist_barrier, get_dist_local_rank, is_master
 from ...nn.norm import reset_bn
 from ...utils import is_parallel, load_state_dict_from_file
+from .....calibration import expected_calibration_error, fit_temperature
 
 __all__ = ["Trainer"]
 
@@ -173,6 +174,31 @@ class Trainer:
         model.eval()
         return self._validate(model, data_loader, epoch)
 
+    def collect_logits(self, model=None, data_loader=None, is_test=False) -> tuple[torch.Tensor, torch.Tensor]:
+        """Logits and labels of a whole loader (the validation set by default), on CPU."""
+        model = model or self.eval_network
+        if data_loader is None:
+            data_loader = self.data_provider.test if is_test else self.data_provider.valid
+        model.eval()
+        logits, labels = [], []
+        with torch.no_grad():
+            for feed_dict in data_loader:
+                logits.append(model(feed_dict["data"].cuda()).float().cpu())
+                labels.append(feed_dict["label"].cpu())
+        return torch.cat(logits), torch.cat(labels)
+
+    def calibrate(self, model=None, data_loader=None) -> dict[str, any]:
+        """Fit the softmax temperature on the validation set, see ``ResEViT_Road.calibration``."""
+        logits, labels = self.collect_logits(model, data_loader, is_test=False)
+        temperature = fit_temperature(logits, labels)
+        results = {
+            "temperature": temperature,
+            "ece": expected_calibration_error(logits.softmax(dim=1), labels),
+            "calibrated_ece": expected_calibration_error((logits / temperature).softmax(dim=1), labels),
+        }
+        self.write_log(", ".join(f"{k}={v:.4f}" for k, v in results.items()), prefix="calibration")
+        return results
+
     def multires_validate(
         self,
         model=None,
@@ -0,0 +1,103 @@
+from typing import Union
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from ..data_provider import DataProvider
+from ..utils import AverageMeter
+from .base import Trainer
+
+__all__ = ["EarlyExitTrainer"]
+
+
+class EarlyExitTrainer(Trainer):
+    """Classification trainer for models with early-exit heads (``ResEViT_road_cls(exit_stages=...)``).
+
+    The model is called with ``return_exits=True`` and returns the logits of
+    every exit head followed by the final ones. The loss is the final
+    cross-entropy plus the cross-entropy of each exit weighted by ``exit_weights``.
+    With ``freeze_backbone`` only the exit heads are trained, so an already
+    trained checkpoint keeps its final accuracy.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: nn.Module,
+        data_provider: DataProvider,
+        exit_weights: Union[list, tuple] = (0.5, 0.5),
+        freeze_backbone: bool = False,
+        label_smoothing: float = 0.0,
+    ) -> None:
+        super().__init__(path=path, model=model, data_provider=data_provider)
+        self.exit_weights = list(exit_weights)
+        self.freeze_backbone = freeze_backbone
+        self.label_smoothing = label_smoothing
+        if freeze_backbone:
+            for name, param in self.network.named_parameters():
+                param.requires_grad = name.startswith("exit_heads.")
+
+    def _validate(self, model, data_loader, epoch) -> dict[str, any]:
+        top1 = None
+        loss_meter = AverageMeter()
+        with torch.no_grad():
+            for feed_dict in data_loader:
+                images, labels = feed_dict["data"].cuda(), feed_dict["label"].cuda()
+                outputs = model(images, return_exits=True)
+                if top1 is None:
+                    top1 = [AverageMeter() for _ in outputs]
+                loss_meter.update(F.cross_entropy(outputs[-1], labels), images.shape[0])
+                for meter, output in zip(top1, outputs):
+                    meter.update((output.argmax(dim=1) == labels).float().mean() * 100, images.shape[0])
+        results = {f"exit{i}_top1": meter.avg for i, meter in enumerate(top1[:-1])}
+        results.update({"val_top1": top1[-1].avg, "val_loss": loss_meter.avg})
+        return results
+
+    def run_step(self, feed_dict: dict[str, any]) -> dict[str, any]:
+        images, labels = feed_dict["data"], feed_dict["label"]
+        with torch.autocast(device_type="cuda", dtype=self.amp_dtype, enabled=self.enable_amp):
+            outputs = self.model(images, return_exits=True)
+            exit_losses = [F.cross_entropy(output, labels, label_smoothing=self.label_smoothing) for output in outputs]
+            loss = sum(w * l for w, l in zip(self.exit_weights, exit_losses[:-1]))
+            if not self.freeze_backbone:
+                loss = loss + exit_losses[-1]
+        self.scaler.scale(loss).backward()
+        return {"loss": loss, "exit_losses": [l.detach() for l in exit_losses]}
+
+    def _train_one_epoch(self, epoch: int) -> dict[str, any]:
+        if self.freeze_backbone:
+            # keep the BatchNorm statistics of the frozen backbone
+            self.network.baseModel.eval()
+        loss_meter = AverageMeter()
+        exit_meters = None
+        for feed_dict in self.data_provider.train:
+            feed_dict = self.before_step(feed_dict)
+            self.optimizer.zero_grad()
+            output_dict = self.run_step(feed_dict)
+            self.after_step()
+
+            batch_size = feed_dict["data"].shape[0]
+            loss_meter.update(output_dict["loss"].detach(), batch_size)
+            if exit_meters is None:
+                exit_meters = [AverageMeter() for _ in output_dict["exit_losses"]]
+            for meter, exit_loss in zip(exit_meters, output_dict["exit_losses"]):
+                meter.update(exit_loss, batch_size)
+        results = {"train_loss": loss_meter.avg}
+        results.update({f"exit{i}_loss": meter.avg for i, meter in enumerate(exit_meters[:-1])})
+        return results
+
+    def train(self) -> None:
+        for epoch in range(self.start_epoch, self.run_config.n_epochs + self.run_config.warmup_epochs):
+            train_info = self.train_one_epoch(epoch)
+            val_info = self.validate(epoch=epoch, is_test=False)
+            is_best = val_info["val_top1"] > self.best_val
+            self.best_val = max(val_info["val_top1"], self.best_val)
+            self.write_log(
+                f"epoch {epoch}: "
+                + ", ".join(f"{k}={v:.4f}" for k, v in {**train_info, **val_info}.items())
+                + f", best_val={self.best_val:.2f}"
+            )
+            self.save_model(only_state_dict=False, epoch=epoch, model_name="checkpoint.pt")
+            if is_best:
+                self.save_model(epoch=epoch, model_name="model_best.pt")
@@ -4,7 +4,7 @@
 
 from ..utils.dist import *
 from ..utils.ema import *
-# from ..utils.export import *
+from ..utils.export import *
 from ..utils.init import *
 from ..utils.lr import *
 from ..utils.metric import *
@@ -1,5 +1,6 @@
 __all__ = [
     "list_sum",
+    "list_mean",
     "weighted_list_sum",
     "val2list",
     "val2tuple",
@@ -10,6 +11,10 @@ def list_sum(x: list) -> any:
     return x[0] if len(x) == 1 else x[0] + list_sum(x[1:])
 
 
+def list_mean(x: list) -> any:
+    return list_sum(x) / len(x)
+
+
 def weighted_list_sum(x: list, weights: list) -> any:
     assert len(x) == len(weights)
     return x[0] * weights[0] if len(x) == 1 else x[0] * weights[0] + weighted_list_sum(x[1:], weights[1:])
@@ -2,21 +2,29 @@
 # Han Cai, Junyan Li, Muyan Hu, Chuang Gan, Song Han
 # International Conference on Computer Vision (ICCV), 2023
 
+import os
 from inspect import signature
 
 import torch
+import torch.nn as nn
 import torch.nn.functional as F
 from typing import Tuple,List,Dict, Any
 
 
 __all__ = [
+    "is_parallel",
     "get_same_padding",
     "resize",
-    "build_kwargs_from_config"
+    "build_kwargs_from_config",
+    "load_state_dict_from_file",
 ]
 
 
 
+def is_parallel(model: nn.Module) -> bool:
+    return isinstance(model, (nn.parallel.DataParallel, nn.parallel.DistributedDataParallel))
+
+
 def get_same_padding(kernel_size: int or Tuple[int, ...]) -> int or Tuple[int, ...]:
     if isinstance(kernel_size, Tuple):
         return tuple([get_same_padding(ks) for ks in kernel_size])
@@ -55,3 +63,9 @@ def build_kwargs_from_config(config: dict, target_func: callable) -> Dict[str, A
     return kwargs
 
 
+def load_state_dict_from_file(file: str, only_state_dict=True) -> Dict[str, torch.Tensor]:
+    file = os.path.realpath(os.path.expanduser(file))
+    checkpoint = torch.load(file, map_location="cpu", weights_only=True)
+    if only_state_dict and "state_dict" in checkpoint:
+        checkpoint = checkpoint["state_dict"]
+    return checkpoint
@@ -1,8 +1,12 @@
+from typing import Any, Optional
+
+import numpy as np
 import torch
 
 __all__ = [
     "torch_random",
     "torch_uniform",
+    "torch_random_choices",
 ]
 
 
@@ -15,4 +19,30 @@ def torch_random(generator: torch.Generator or None = None) -> float:
 def torch_uniform(low: float, high: float, generator: torch.Generator or None = None) -> float:
     """uniform distribution on the interval [low, high)"""
     rand_val = torch_random(generator)
-    return (high - low) * rand_val + low
\ No newline at end of file
+    return (high - low) * rand_val + low
+
+
+def torch_random_choices(
+    src_list: list,
+    generator: Optional[torch.Generator] = None,
+    k=1,
+    weight_list: Optional[list] = None,
+) -> Any:
+    if weight_list is None:
+        rand_idx = torch.randint(low=0, high=len(src_list), generator=generator, size=(k,))
+        out_list = [src_list[i] for i in rand_idx]
+    else:
+        assert len(weight_list) == len(src_list)
+        accumulate_weight_list = np.cumsum(weight_list)
+
+        out_list = []
+        for _ in range(k):
+            val = torch_uniform(0, accumulate_weight_list[-1], generator)
+            active_id = 0
+            for i, weight_val in enumerate(accumulate_weight_list):
+                active_id = i
+                if weight_val > val:
+                    break
+            out_list.append(src_list[active_id])
+
+    return out_list[0] if k == 1 else out_list
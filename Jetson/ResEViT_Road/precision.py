@@ -0,0 +1,232 @@
+import copy
+from functools import partial
+
+import torch
+from torch import nn
+from torch.ao import quantization as tq
+from torch.ao.nn.quantized import FloatFunctional
+
+from .fuse import fuse_for_inference
+from .modules.efficientvitb1_block.nn.ops import ConvLayer, EfficientViTBlock, ResidualBlock
+from .modules.resnet18_block.resnet18 import BasicBlock
+from .resevit_road import CrossAttention
+
+__all__ = ["PRECISIONS", "AutocastModel", "HalfModel", "quantize_dynamic_int8", "prepare_static_int8",
+           "convert_static_int8", "to_precision"]
+
+PRECISIONS = ("fp32", "fp16", "bf16", "fp16_weights", "bf16_weights", "int8_dynamic", "int8")
+AUTOCAST_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16}
+HALF_DTYPES = {"fp16_weights": torch.float16, "bf16_weights": torch.bfloat16}
+NORM_TYPES = (nn.modules.batchnorm._BatchNorm, nn.LayerNorm, nn.GroupNorm)
+
+
+class AutocastModel(nn.Module):
+    """Run the wrapped model under ``torch.autocast`` and return fp32 outputs.
+
+    The weights stay in fp32; matmuls and convs run in ``dtype`` while the
+    precision-sensitive ops (softmax, norms, the linear attention of LiteMLA)
+    keep running in fp32.
+    """
+
+    def __init__(self, model: nn.Module, dtype: torch.dtype = torch.float16):
+        super().__init__()
+        self.model = model
+        self.dtype = dtype
+
+    def forward(self, x):
+        with torch.autocast(device_type=x.device.type, dtype=self.dtype):
+            out = self.model(x)
+        return out.float()
+
+
+def _cast_inputs(dtype, module, inputs):
+    return tuple(x.to(dtype) if torch.is_tensor(x) and x.is_floating_point() else x for x in inputs)
+
+
+def _cast_output(dtype, module, inputs, output):
+    return output.to(dtype)
+
+
+class HalfModel(nn.Module):
+    """Store the weights of the wrapped model in ``dtype`` and return fp32 outputs.
+
+    Unlike ``AutocastModel`` nothing is cast per forward, and the weights take
+    half the memory. The norm layers (BatchNorm, LayerNorm) keep fp32 weights
+    and run on fp32 inputs, cast back to ``dtype`` after them; the ops that
+    upcast on their own (the linear attentions) hand fp32 to the next layer,
+    which casts it back. ``to_precision`` folds the BatchNorms into the convs first.
+    """
+
+    def __init__(self, model: nn.Module, dtype: torch.dtype = torch.float16):
+        super().__init__()
+        self.model = model.to(dtype)
+        self.dtype = dtype
+        for module in self.model.modules():
+            if isinstance(module, NORM_TYPES):
+                module.float()
+                module.register_forward_pre_hook(partial(_cast_inputs, torch.float32))
+                module.register_forward_hook(partial(_cast_output, dtype))
+            elif any(True for _ in module.parameters(recurse=False)):
+                module.register_forward_pre_hook(partial(_cast_inputs, dtype))
+
+    def forward(self, x):
+        return self.model(x.to(self.dtype)).float()
+
+
+def _set_engine(backend: str) -> None:
+    if backend not in torch.backends.quantized.supported_engines:
+        raise RuntimeError(f"Quantized engine {backend} is not available, supported: "
+                           f"{torch.backends.quantized.supported_engines}")
+    torch.backends.quantized.engine = backend
+
+
+def quantize_dynamic_int8(model: nn.Module, backend: str = "fbgemm") -> nn.Module:
+    """int8 weights for every ``nn.Linear`` (Interactive_block.mlp, classifier), activations quantized on the fly.
+
+    Quantized kernels only run on CPU.
+    """
+    _set_engine(backend)
+    return tq.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+class _QuantBasicBlock(BasicBlock):
+    """``BasicBlock`` whose residual add and final ReLU run on quantized tensors.
+
+    The shared ``relu`` is split: ``relu1`` follows ``conv1`` and is fused
+    with it, the last one is folded into ``add_relu``.
+    """
+
+    @classmethod
+    def from_float(cls, block: BasicBlock) -> "_QuantBasicBlock":
+        block.__class__ = cls
+        block.relu1 = nn.ReLU()
+        block.add_relu = FloatFunctional()
+        return block
+
+    def forward(self, x):
+        identity = x if self.downsample is None else self.downsample(x)
+        out = self.relu1(self.bn1(self.conv1(x)))
+        out = self.bn2(self.conv2(out))
+        return self.add_relu.add_relu(out, identity)
+
+
+class _QuantResidualBlock(ResidualBlock):
+    """``ResidualBlock`` whose shortcut add runs on quantized tensors."""
+
+    @classmethod
+    def from_float(cls, block: ResidualBlock) -> "_QuantResidualBlock":
+        block.__class__ = cls
+        block.add = FloatFunctional()
+        return block
+
+    def forward(self, x):
+        if self.main is None or self.shortcut is None:
+            return super().forward(x)
+        res = self.add.add(self.forward_main(x), self.shortcut(x))
+        return self.post_act(res) if self.post_act else res
+
+
+def _make_quantizable(module: nn.Module) -> None:
+    """Swap the residual blocks of a stage for their quantizable variants and fuse every Conv+ReLU."""
+    for child in module.modules():
+        if type(child) is BasicBlock:
+            _QuantBasicBlock.from_float(child)
+            tq.fuse_modules(child, [["conv1", "relu1"]], inplace=True)
+        elif type(child) is ResidualBlock:
+            _QuantResidualBlock.from_float(child)
+        elif type(child) is ConvLayer and type(child.conv) is nn.Conv2d and type(child.act) is nn.ReLU:
+            tq.fuse_modules(child, [["conv", "act"]], inplace=True)
+        elif type(getattr(child, "conv", None)) is nn.Conv2d and type(getattr(child, "relu", None)) is nn.ReLU:
+            # ResNet_input: conv (BatchNorm folded), relu, max_pool
+            tq.fuse_modules(child, [["conv", "relu"]], inplace=True)
+
+
+def _quantized_stages(model: nn.Module) -> list:
+    """``(parent, name)`` of the contiguous convolutional stages of ResEViT.
+
+    The ResNet stem and stages, the EfficientViT stem, the MBConv half of every
+    EfficientViT block and the q/k/v projections of the cross attention only
+    hold convs, activations, pooling and residual adds, so each runs in int8
+    between a single quant/dequant pair. Attention, the interactive blocks and
+    the heads stay in fp32.
+    """
+    base = getattr(model, "baseModel", None)
+    if base is None:
+        return []
+    stages = [(base, "resnet_input"), (base, "efficientViT_input")]
+    stages += [(base.resnet_blocks, str(i)) for i in range(len(base.resnet_blocks))]
+    for module in base.modules():
+        if isinstance(module, EfficientViTBlock):
+            stages.append((module, "local_module"))
+        elif isinstance(module, CrossAttention):
+            stages += [(module, "q"), (module, "k"), (module, "v")]
+    return stages
+
+
+def _wrap_convs(module: nn.Module, qconfig) -> int:
+    count = 0
+    for name, child in module.named_children():
+        if type(child) is nn.Conv2d:
+            wrapper = tq.QuantWrapper(child)
+            wrapper.qconfig = qconfig
+            setattr(module, name, wrapper)
+            count += 1
+        else:
+            count += _wrap_convs(child, qconfig)
+    return count
+
+
+def prepare_static_int8(model: nn.Module, backend: str = "fbgemm") -> nn.Module:
+    """Fold BatchNorm, fuse Conv+ReLU and insert observers in the convolutional stages.
+
+    Each stage found by ``_quantized_stages`` gets one quant/dequant pair. Other
+    architectures fall back to a pair around every conv, which keeps the ops
+    between them in fp32 at the cost of a requantization per conv. Run
+    calibration batches through the result.
+    """
+    _set_engine(backend)
+    model = fuse_for_inference(copy.deepcopy(model).cpu(), inplace=True)
+    qconfig = tq.get_default_qconfig(backend)
+    stages = _quantized_stages(model)
+    for parent, name in stages:
+        stage = getattr(parent, name)
+        _make_quantizable(stage)
+        wrapper = tq.QuantWrapper(stage)
+        wrapper.qconfig = qconfig
+        setattr(parent, name, wrapper)
+    if not stages:
+        _wrap_convs(model, qconfig)
+    return tq.prepare(model, inplace=True)
+
+
+def convert_static_int8(model: nn.Module) -> nn.Module:
+    """Turn a calibrated model into int8 convs, then dynamically quantize the Linear layers."""
+    model = tq.convert(model.eval(), inplace=True)
+    return tq.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+@torch.no_grad()
+def to_precision(model: nn.Module, precision: str = "fp32", calibration_batches=None,
+                 backend: str = "fbgemm") -> nn.Module:
+    """Return ``model`` prepared for inference in ``precision`` (one of ``PRECISIONS``).
+
+    ``int8`` needs ``calibration_batches``, an iterable of ``(N, 3, H, W)``
+    tensors of representative frames. The int8 modes return a CPU model.
+    """
+    assert precision in PRECISIONS, f"precision must be one of {PRECISIONS}"
+    model.eval()
+    if precision == "fp32":
+        return model
+    if precision in AUTOCAST_DTYPES:
+        return AutocastModel(model, AUTOCAST_DTYPES[precision]).eval()
+    if precision in HALF_DTYPES:
+        return HalfModel(fuse_for_inference(model), HALF_DTYPES[precision]).eval()
+    if precision == "int8_dynamic":
+        return quantize_dynamic_int8(fuse_for_inference(model).cpu(), backend)
+
+    if calibration_batches is None:
+        raise ValueError("Static int8 quantization needs calibration_batches")
+    prepared = prepare_static_int8(model, backend)
+    for batch in calibration_batches:
+        prepared(batch.cpu())
+    return convert_static_int8(prepared)
@@ -4,6 +4,70 @@ from .layers.nn import ConcatLayer,InterleavedLayer,InverseResidualBlock
 import torch
 import torch.nn.functional as F
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from torch.cuda.amp import autocast
+
+BRANCH_MODES = ("sequential", "parallel")
+ATTENTION_MODES = ("softmax", "linear")
+
+# shared by every model so that deepcopy/pickling of the modules keeps working
+_branch_executor = None
+_branch_streams = {}
+
+
+def _get_branch_executor():
+    global _branch_executor
+    if _branch_executor is None:
+        # each branch gets its own half of the intra-op threads instead of both fighting over all of them
+        num_threads = max(1, torch.get_num_threads() // 2)
+        _branch_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="resevit-branch", initializer=torch.set_num_threads, initargs=(num_threads,)
+        )
+    return _branch_executor
+
+
+def _get_branch_streams(device):
+    if device not in _branch_streams:
+        _branch_streams[device] = (torch.cuda.Stream(device), torch.cuda.Stream(device))
+    return _branch_streams[device]
+
+
+def run_branches(res_fn, res, vit_fn, vit):
+    """Run ``res_fn(res)`` and ``vit_fn(vit)`` concurrently and return both results.
+
+    On CUDA each branch is queued on its own stream and the current stream waits
+    for both; on CPU each branch runs in its own worker thread with half of the
+    intra-op threads (PyTorch kernels release the GIL).
+    """
+    if res.is_cuda:
+        current = torch.cuda.current_stream(res.device)
+        res_stream, vit_stream = _get_branch_streams(res.device)
+        res_stream.wait_stream(current)
+        vit_stream.wait_stream(current)
+        with torch.cuda.stream(res_stream):
+            res.record_stream(res_stream)
+            res = res_fn(res)
+        with torch.cuda.stream(vit_stream):
+            vit.record_stream(vit_stream)
+            vit = vit_fn(vit)
+        current.wait_stream(res_stream)
+        current.wait_stream(vit_stream)
+        res.record_stream(current)
+        vit.record_stream(current)
+        return res, vit
+
+    # grad mode is thread local, carry it over to the worker thread
+    grad_enabled = torch.is_grad_enabled()
+    inference_mode = torch.is_inference_mode_enabled()
+
+    def run(fn, t):
+        with torch.inference_mode(inference_mode), torch.set_grad_enabled(grad_enabled):
+            return fn(t)
+
+    executor = _get_branch_executor()
+    res_future = executor.submit(run, res_fn, res)
+    vit_future = executor.submit(run, vit_fn, vit)
+    return res_future.result(), vit_future.result()
 
 
 
@@ -39,9 +103,21 @@ class Interactive_block(nn.Module):
         return result+x,result+y
 
 class CrossAttention(nn.Module):
-    def __init__(self,x_channel,y_channel,image_size,out_channel=512):
+    """Cross attention fusing the ResNet (queries, values) and EfficientViT (keys) features.
+
+    ``attention="softmax"`` builds the full ``[B, HW, HW]`` attention map.
+    ``attention="linear"`` uses ReLU kernels instead of the softmax, like
+    ``LiteMLA.relu_linear_att``: ``relu(q) @ (relu(k) @ v)`` normalized by
+    ``relu(q) @ sum(relu(k))``, which is linear in ``HW`` (cheaper once ``HW``
+    exceeds ``out_channel``). The two modes share the same weights but are not
+    numerically equivalent, a checkpoint trained with one needs fine-tuning for the other.
+    """
+    def __init__(self,x_channel,y_channel,image_size,out_channel=512,attention="softmax",eps=1e-15):
         super(CrossAttention, self).__init__()
+        assert attention in ATTENTION_MODES, f"attention must be one of {ATTENTION_MODES}"
         self.out_d=out_channel
+        self.attention=attention
+        self.eps=eps
         self.q =nn.Sequential(
             nn.Conv2d(in_channels=x_channel,out_channels=x_channel,kernel_size=3,stride=1,padding=1,groups=x_channel),
             nn.Conv2d(in_channels=x_channel,out_channels=out_channel,kernel_size=1),
@@ -56,6 +132,21 @@ class CrossAttention(nn.Module):
         )
         self.relu=nn.ReLU(inplace=True)
 
+    def softmax_att(self,q,k,v):
+        attn_weights = torch.matmul(q, k) / (self.out_d ** 0.5)
+        attn_weights = F.softmax(attn_weights, dim=-1)
+        return torch.matmul(attn_weights, v)
+
+    @autocast(enabled=False)
+    def relu_linear_att(self,q,k,v):
+        q = F.relu(q.float())  # [B, HW, C]
+        k = F.relu(k.float())  # [B, C, HW]
+        v = v.float()  # [B, HW, C]
+        kv = torch.matmul(k, v)  # [B, C, C]
+        out = torch.matmul(q, kv)  # [B, HW, C]
+        normalizer = torch.matmul(q, k.sum(dim=-1, keepdim=True))  # [B, HW, 1]
+        return out / (normalizer + self.eps)
+
     def forward(self,x,y):
         B, _, H, W = x.shape  # Batch size, height, width
 
@@ -63,10 +154,12 @@ class CrossAttention(nn.Module):
         k = self.k(y).reshape(B, self.out_d, -1)  # [B, C, HW]
         v=self.v(x).reshape(B, self.out_d, -1).permute(0, 2, 1)
 
-        attn_weights = torch.matmul(q, k) / (self.out_d ** 0.5)
-        attn_weights = F.softmax(attn_weights, dim=-1)
+        if self.attention == "linear":
+            attn_out = self.relu_linear_att(q, k, v).to(x.dtype)
+        else:
+            attn_out = self.softmax_att(q, k, v)
 
-        attn_out = torch.matmul(attn_weights, v).permute(0, 2, 1).reshape(B, self.out_d, H, W)
+        attn_out = attn_out.permute(0, 2, 1).reshape(B, self.out_d, H, W)
         attn_out = self.relu(attn_out)
         return attn_out
 
@@ -75,9 +168,12 @@ class ResEViT_road_backbone(nn.Module):
                  res_channels: List[int] = [32, 32,64,128, 256],
                  res_depths: List[int] = [1, 2, 2, 2],
                  efficientViT_channels: List[int] = [32,32,64, 128, 256],
-                 efficientViT_depths: List[int] = [1, 1, 2, 2]) -> None:
+                 efficientViT_depths: List[int] = [1, 1, 2, 2],
+                 branch_mode: str = "sequential",
+                 attention: str = "softmax") -> None:
 
         super().__init__()
+        self.set_branch_mode(branch_mode)
         self.resnet_input=ResNet_input(img_channels=3,out_channel=res_channels[0])
         self.efficientViT_input=EfficientViT_input(3,efficientViT_channels[0],2)
         self.resnet_blocks=nn.ModuleList()
@@ -91,22 +187,63 @@ class ResEViT_road_backbone(nn.Module):
             self.interactive_blocks.append(Interactive_block(res_channel,vit_channel))
             res_out_channel=res_channel
             vit_out_channel=vit_channel
-        self.combine_block=CrossAttention(res_out_channel,vit_out_channel,4)
+        self.combine_block=CrossAttention(res_out_channel,vit_out_channel,4,attention=attention)
+
+    def set_branch_mode(self, mode: str):
+        """``"parallel"`` runs the ResNet and EfficientViT branches of every stage concurrently."""
+        assert mode in BRANCH_MODES, f"branch_mode must be one of {BRANCH_MODES}"
+        self.branch_mode = mode
+        return self
+
+    def _parallel(self):
+        # tracing/scripting (ONNX, TorchScript) always records the sequential graph
+        return self.branch_mode == "parallel" and not torch.jit.is_tracing() and not torch.jit.is_scripting()
+
+    def forward_stem(self,x):
+        if self._parallel():
+            return run_branches(self.resnet_input,x,self.efficientViT_input,x)
+        return self.resnet_input(x),self.efficientViT_input(x)
+
+    def forward_stage(self,i,res,vit):
+        if self._parallel():
+            res,vit=run_branches(self.resnet_blocks[i],res,self.efficientViT_blocks[i],vit)
+        else:
+            res=self.resnet_blocks[i](res)
+            vit=self.efficientViT_blocks[i](vit)
+        return self.interactive_blocks[i](res,vit)
 
     def forward(self,x):
-        res=self.resnet_input(x)
-        vit=self.efficientViT_input(x)
-        for res_block,efficientViT_block,interactive_block in zip(self.resnet_blocks,self.efficientViT_blocks, self.interactive_blocks):
-            res=res_block(res)
-            vit=efficientViT_block(vit)
-            res,vit=interactive_block(res,vit)
+        res,vit=self.forward_stem(x)
+        for i in range(len(self.resnet_blocks)):
+            res,vit=self.forward_stage(i,res,vit)
         x=self.combine_block(res,vit)
         return x
 
+class ExitHead(nn.Module):
+    """Lightweight classifier on the pooled ResNet and EfficientViT features of an intermediate stage."""
+    def __init__(self,res_channel,vit_channel,num_classes):
+        super().__init__()
+        self.pool=nn.AdaptiveAvgPool2d(1)
+        self.norm=nn.LayerNorm(res_channel+vit_channel)
+        self.fc=nn.Linear(res_channel+vit_channel,num_classes)
+
+    def forward(self,res,vit):
+        x=torch.cat((self.pool(res),self.pool(vit)),dim=1).flatten(1)
+        return self.fc(self.norm(x))
+
 class ResEViT_road_cls(nn.Module):
-    def __init__(self,num_classes=2):
+    """ResEViT classifier.
+
+    ``exit_stages`` adds an ``ExitHead`` after these stages (0-based, ``(1, 2)``
+    is after stages 2 and 3). In eval mode with ``exit_threshold`` set, a frame
+    leaves at the first head whose softmax confidence reaches the threshold and
+    whose predicted class is in ``exit_classes`` (all classes if None); the
+    other frames of the batch go on through the remaining stages.
+    """
+    def __init__(self,num_classes=2,branch_mode="sequential",attention="softmax",
+                 exit_stages=(),exit_threshold=None,exit_classes=None):
         super().__init__()
-        self.baseModel=ResEViT_road_backbone()
+        self.baseModel=ResEViT_road_backbone(branch_mode=branch_mode,attention=attention)
         self.adaptive=nn.AdaptiveAvgPool2d(1)
         self.classification=nn.Sequential(
             nn.Flatten(),
@@ -114,8 +251,85 @@ class ResEViT_road_cls(nn.Module):
             nn.ReLU(inplace=True),
             nn.Linear(512,num_classes)
         )
-    def forward(self,x):
+        self.exit_stages=tuple(exit_stages)
+        self.exit_heads=nn.ModuleDict()
+        for i in self.exit_stages:
+            self.exit_heads[str(i)]=ExitHead(*self._stage_channels(i),num_classes)
+        self.set_early_exit(exit_threshold,exit_classes)
+        # number of frames that left at each exit (stage index, -1 for the final head) since the last reset
+        self.exit_counts={}
+
+    def _stage_channels(self,i):
+        interactive=self.baseModel.interactive_blocks[i]
+        return interactive.down_channel1.in_channels,interactive.down_channel2.in_channels
+
+    def set_branch_mode(self, mode: str):
+        self.baseModel.set_branch_mode(mode)
+        return self
+
+    def set_early_exit(self,threshold=None,classes=None):
+        """Confidence threshold (None disables early exit) and the classes allowed to exit early."""
+        self.exit_threshold=threshold
+        self.exit_classes=None if classes is None else torch.as_tensor(list(classes),device="cpu")
+        return self
+
+    def _head(self,x):
+        x=self.adaptive(self.baseModel.combine_block(*x))
+        return self.classification(x)
+
+    def forward_exits(self,x):
+        """Logits of every exit head followed by the final ones, for training and threshold sweeps."""
+        outputs=[]
+        res,vit=self.baseModel.forward_stem(x)
+        for i in range(len(self.baseModel.resnet_blocks)):
+            res,vit=self.baseModel.forward_stage(i,res,vit)
+            if str(i) in self.exit_heads:
+                outputs.append(self.exit_heads[str(i)](res,vit))
+        outputs.append(self._head((res,vit)))
+        return outputs
+
+    def _exit_mask(self,logits):
+        confidence,pred=logits.softmax(dim=1).max(dim=1)
+        mask=confidence>=self.exit_threshold
+        if self.exit_classes is not None:
+            mask&=torch.isin(pred,self.exit_classes.to(pred.device))
+        return mask
+
+    def forward_early_exit(self,x):
+        res,vit=self.baseModel.forward_stem(x)
+        output=None
+        active=torch.arange(x.shape[0],device=x.device)
+        for i in range(len(self.baseModel.resnet_blocks)):
+            res,vit=self.baseModel.forward_stage(i,res,vit)
+            if str(i) not in self.exit_heads:
+                continue
+            logits=self.exit_heads[str(i)](res,vit)
+            if output is None:
+                output=logits.new_empty(x.shape[0],logits.shape[1])
+            mask=self._exit_mask(logits)
+            num_exits=int(mask.sum())
+            if num_exits:
+                output[active[mask]]=logits[mask]
+                self.exit_counts[i]=self.exit_counts.get(i,0)+num_exits
+                if num_exits==len(active):
+                    return output
+                keep=~mask
+                active,res,vit=active[keep],res[keep],vit[keep]
+        logits=self._head((res,vit))
+        self.exit_counts[-1]=self.exit_counts.get(-1,0)+len(active)
+        if output is None:
+            return logits
+        output[active]=logits
+        return output
+
+    def forward(self,x,return_exits=False):
+        if return_exits:
+            return self.forward_exits(x)
+        # early exit is data dependent, exported graphs always run the full model
+        if (not self.training and self.exit_threshold is not None and len(self.exit_heads)
+                and not torch.jit.is_tracing() and not torch.jit.is_scripting()):
+            return self.forward_early_exit(x)
         x=self.baseModel(x)
         x=self.adaptive(x)
         x=self.classification(x)
-        return x
\ No newline at end of file
+        return x
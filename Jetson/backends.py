@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import os
+from typing import Optional
+
+import numpy as np
+import torch
+from torch import nn
+
+from ResEViT_Road.export import export_onnx, export_torchscript
+
+__all__ = ["BACKENDS", "TorchBackend", "TorchScriptBackend", "CompiledBackend", "OnnxRuntimeBackend",
+           "model_fingerprint", "create_backend", "check_backend"]
+
+BACKENDS = ("torch", "torchscript", "compile", "onnxruntime")
+
+
+class TorchBackend:
+    """Eager PyTorch. Every backend is a callable from an ``(N, 3, H, W)`` float tensor to ``(N, num_classes)`` logits."""
+
+    def __init__(self, model: nn.Module, device="cpu"):
+        self.device = torch.device(device)
+        self.model = model.to(self.device).eval()
+
+    @torch.no_grad()
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return self.model(x.to(self.device, non_blocking=True))
+
+
+class TorchScriptBackend(TorchBackend):
+    def __init__(self, path: str, device="cpu", optimize: bool = True):
+        module = torch.jit.load(path, map_location=device).eval()
+        if optimize:
+            # conv/bn/add folding and fused kernels for the frozen graph
+            module = torch.jit.optimize_for_inference(module)
+        super().__init__(module, device)
+
+
+class CompiledBackend(TorchBackend):
+    """``torch.compile`` with static shapes, warmed up for every batch size at load time.
+
+    Compiled kernels are written to ``cache_path`` (``torch.compiler`` cache
+    artifacts) and loaded back on the next boot, so code generation is only
+    paid once per model, torch version and device; Dynamo still re-traces the
+    model at every start. For the fastest boot use the ``torchscript`` backend,
+    whose frozen graph loads in well under a second.
+    """
+
+    def __init__(self, model: nn.Module, device="cpu", cache_path: Optional[str] = None, mode: Optional[str] = None,
+                 warmup_shapes=((1, 3, 224, 224),)):
+        super().__init__(model, device)
+        self.cache_path = cache_path
+        can_cache = cache_path is not None and hasattr(torch.compiler, "load_cache_artifacts")
+        if can_cache and os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                torch.compiler.load_cache_artifacts(f.read())
+        self.model = torch.compile(self.model, mode=mode, dynamic=False)
+        for shape in warmup_shapes:
+            self(torch.randn(*shape))
+        if can_cache and not os.path.exists(cache_path):
+            artifacts = torch.compiler.save_cache_artifacts()
+            if artifacts is not None:
+                os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+                with open(cache_path + ".tmp", "wb") as f:
+                    f.write(artifacts[0])
+                os.replace(cache_path + ".tmp", cache_path)
+
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime session; takes and returns CPU tensors, the execution providers do their own copies."""
+
+    def __init__(self, path: str, providers=None, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        # TensorRT / CUDA first when this onnxruntime build has them
+        providers = providers or ort.get_available_providers()
+        self.session = ort.InferenceSession(path, options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        inputs = np.ascontiguousarray(x.detach().cpu().numpy(), dtype=np.float32)
+        return torch.from_numpy(self.session.run(None, {self.input_name: inputs})[0])
+
+
+def model_fingerprint(model: nn.Module, *extra) -> str:
+    """Short hash of the weights, the torch version and ``extra`` (shapes, device...), used to name cached graphs."""
+    digest = hashlib.sha1(torch.__version__.encode())
+    for name, tensor in model.state_dict().items():
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+    digest.update(repr(extra).encode())
+    return digest.hexdigest()[:16]
+
+
+CACHE_EXTENSIONS = {"torchscript": ".ts", "compile": ".compile", "onnxruntime": ".onnx"}
+
+
+def create_backend(name: str, model: Optional[nn.Module] = None, path: Optional[str] = None, device="cpu",
+                   image_size: int = 224, max_batch_size: int = 1, cache_dir: str = "model_cache"):
+    """Build the ``name`` backend (one of ``BACKENDS``).
+
+    ``torchscript`` and ``onnxruntime`` load ``path``; when it does not exist
+    yet, ``model`` is exported there first. Without ``path`` the graph is
+    cached in ``cache_dir`` under a fingerprint of the weights, device and
+    input size, so a new checkpoint never reuses a stale graph. ``compile``
+    keeps its compiled kernels there too.
+    """
+    assert name in BACKENDS, f"backend must be one of {BACKENDS}"
+    if name == "torch":
+        return TorchBackend(model, device)
+
+    if path is None:
+        fingerprint = model_fingerprint(model, name, str(device), image_size)
+        path = os.path.join(cache_dir, fingerprint + CACHE_EXTENSIONS[name])
+    if name == "compile":
+        warmup_shapes = [(batch_size, 3, image_size, image_size) for batch_size in range(1, max_batch_size + 1)]
+        return CompiledBackend(model, device, cache_path=path, warmup_shapes=warmup_shapes)
+
+    if not os.path.exists(path):
+        print(f"Exporting the model to {path}")
+        sample_inputs = torch.randn(1, 3, image_size, image_size)
+        model = copy.deepcopy(model).eval()
+        if name == "torchscript":
+            # traced and frozen on the device it will run on
+            export_torchscript(model.to(device), path, sample_inputs.to(device))
+        else:
+            export_onnx(model.cpu(), path, sample_inputs)
+    if name == "torchscript":
+        return TorchScriptBackend(path, device)
+    return OnnxRuntimeBackend(path)
+
+
+@torch.no_grad()
+def check_backend(model: nn.Module, backend, input_shapes=((1, 3, 224, 224),), atol=1e-4) -> float:
+    """Compare ``backend`` with the eager ``model`` on random inputs, return the max abs diff."""
+    model.eval()
+    device = next(model.parameters()).device
+    max_diff = 0.0
+    for shape in input_shapes:
+        x = torch.randn(*shape)
+        diff = (backend(x).float().cpu() - model(x.to(device)).float().cpu()).abs().max().item()
+        if diff > atol:
+            raise AssertionError(f"{type(backend).__name__} differs for input {tuple(shape)}: max abs diff {diff:.2e} > {atol:.0e}")
+        max_diff = max(max_diff, diff)
+    return max_diff
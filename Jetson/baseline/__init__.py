@@ -1,5 +1,26 @@
-from .resnet import ResNet34,ResNet18,ResNet50
-from .efficientnet import EfficientNetB0,EfficientNetB1, EfficientNetB2, EfficientNetB3
-from .efficientvit import efficientvit_cls_b1,efficientvit_cls_b2,efficientvit_cls_b3
-from .mobilevit import  MobileVit_s,MobileViT_xs,MobileViT_xxs
-from .inception import Inception_v4
\ No newline at end of file
+import importlib
+
+# the baselines are imported on first access (PEP 562), so ``from baseline import ResNet18``
+# does not pull in every architecture
+_LAZY_ATTRS = {
+    "ResNet18": ".resnet", "ResNet34": ".resnet", "ResNet50": ".resnet",
+    "EfficientNetB0": ".efficientnet", "EfficientNetB1": ".efficientnet",
+    "EfficientNetB2": ".efficientnet", "EfficientNetB3": ".efficientnet",
+    "efficientvit_cls_b1": ".efficientvit", "efficientvit_cls_b2": ".efficientvit", "efficientvit_cls_b3": ".efficientvit",
+    "MobileVit_s": ".mobilevit", "MobileViT_xs": ".mobilevit", "MobileViT_xxs": ".mobilevit",
+    "Inception_v4": ".inception",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
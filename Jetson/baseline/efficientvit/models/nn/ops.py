@@ -606,7 +606,8 @@ class LiteMLA(nn.Module):
         # linear matmul
         trans_k = k.transpose(-1, -2)
 
-        v = F.pad(v, (0, 0, 0, 1), mode="constant", value=1)
+        # append a row of ones with cat rather than F.pad(value=1): exports to a plain ONNX Concat
+        v = torch.cat([v, torch.ones_like(v[:, :, :1])], dim=2)
         vk = torch.matmul(v, trans_k)
         out = torch.matmul(vk, q)
         if out.dtype == torch.bfloat16:
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+from torch import nn
+
+__all__ = ["BatchInferenceEngine"]
+
+
+class BatchInferenceEngine:
+    """Gather single frames into micro-batches and run them as one forward pass.
+
+    ``submit`` takes one ``(C, H, W)`` tensor and returns a ``Future`` that
+    resolves to the model output row for that frame. A background worker
+    starts a batch with the first waiting frame and closes it when
+    ``max_batch_size`` frames are collected or ``max_latency`` seconds have
+    passed since that first frame arrived, whichever comes first. With
+    ``max_batch_size=1`` every frame runs on its own, as before.
+    """
+
+    def __init__(self, model: nn.Module, max_batch_size: int = 4, max_latency: float = 0.02):
+        assert max_batch_size >= 1
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        self._requests = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.num_batches = 0
+        self.num_frames = 0
+
+    def start(self) -> "BatchInferenceEngine":
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, img: torch.Tensor) -> Future:
+        future = Future()
+        self._requests.put((img, future))
+        return future
+
+    def infer(self, img: torch.Tensor) -> torch.Tensor:
+        return self.submit(img).result()
+
+    @property
+    def avg_batch_size(self) -> float:
+        return self.num_frames / self.num_batches if self.num_batches else 0.0
+
+    def _collect(self) -> list:
+        try:
+            batch = [self._requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            imgs, futures = zip(*batch)
+            try:
+                with torch.no_grad():
+                    output = self.model(torch.stack(imgs))
+                # a single device->host copy per batch instead of one per frame
+                output = output.float().cpu()
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.num_batches += 1
+            self.num_frames += len(futures)
+            for future, row in zip(futures, output):
+                future.set_result(row)
@@ -0,0 +1,196 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import resource
+import time
+from typing import Optional
+
+import numpy as np
+import torch
+from torch import nn
+
+from backends import BACKENDS, create_backend
+
+__all__ = ["time_model", "count_params", "count_macs", "benchmark", "run_grid", "save_results"]
+
+
+def _sync(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize(device)
+
+
+@torch.no_grad()
+def time_model(model, x: torch.Tensor, warmup: int = 20, iters: int = 200) -> np.ndarray:
+    """Per-call latencies in ms. The device is synchronized around every call, so CUDA timings are real."""
+    device = x.device
+    for _ in range(warmup):
+        model(x)
+    _sync(device)
+    latencies = np.empty(iters)
+    for i in range(iters):
+        start_time = time.perf_counter()
+        model(x)
+        _sync(device)
+        latencies[i] = (time.perf_counter() - start_time) * 1000
+    return latencies
+
+
+def count_params(model: nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+@torch.no_grad()
+def count_macs(model: nn.Module, input_shape) -> int:
+    """Multiply-accumulates of one forward pass.
+
+    Uses ``torch.utils.flop_counter`` when available, which also counts the
+    attention matmuls; otherwise forward hooks count the Conv2d and Linear layers only.
+    """
+    device = next(model.parameters()).device
+    x = torch.randn(*input_shape, device=device)
+    try:
+        from torch.utils.flop_counter import FlopCounterMode
+    except ImportError:
+        FlopCounterMode = None
+    if FlopCounterMode is not None:
+        counter = FlopCounterMode(display=False)
+        with counter:
+            model(x)
+        return counter.get_total_flops() // 2
+
+    macs = []
+
+    def conv_hook(module, inputs, output):
+        kernel_ops = module.in_channels // module.groups * module.kernel_size[0] * module.kernel_size[1]
+        macs.append(output.numel() * kernel_ops)
+
+    def linear_hook(module, inputs, output):
+        macs.append(output.numel() * module.in_features)
+
+    handles = []
+    for module in model.modules():
+        if isinstance(module, nn.Conv2d):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, nn.Linear):
+            handles.append(module.register_forward_hook(linear_hook))
+    try:
+        model(x)
+    finally:
+        for handle in handles:
+            handle.remove()
+    return int(sum(macs))
+
+
+def _peak_memory_mb(device: torch.device) -> float:
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated(device) / 1024 ** 2
+    # peak resident set size of the whole process (KiB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark(model, batch_size: int, resolution: int, device="cuda", warmup: int = 20, iters: int = 200) -> dict:
+    device = torch.device(device)
+    if device.type == "cuda":
+        torch.cuda.empty_cache()
+        torch.cuda.reset_peak_memory_stats(device)
+    x = torch.randn(batch_size, 3, resolution, resolution, device=device)
+    latencies = time_model(model, x, warmup=warmup, iters=iters)
+    mean_ms = float(latencies.mean())
+    return {
+        "batch_size": batch_size,
+        "resolution": resolution,
+        "mean_ms": mean_ms,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p90_ms": float(np.percentile(latencies, 90)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput_fps": batch_size * 1000 / mean_ms,
+        "peak_memory_mb": _peak_memory_mb(device),
+    }
+
+
+def run_grid(model, batch_sizes, resolutions, device="cuda", warmup: int = 20, iters: int = 200,
+             eager_model: Optional[nn.Module] = None, **info) -> list:
+    """Benchmark every (batch size, resolution) pair.
+
+    ``model`` is any callable (an ``nn.Module`` or a backend from ``backends.py``);
+    parameters and MACs are counted on ``eager_model``, which defaults to ``model``.
+    ``info`` (model name, backend...) is copied into every row.
+    """
+    eager_model = eager_model if eager_model is not None else model
+    device = torch.device(device)
+    info = {
+        **info,
+        "device": torch.cuda.get_device_name(device) if device.type == "cuda" else platform.processor() or "cpu",
+        "torch": torch.__version__,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": count_params(eager_model),
+    }
+    rows = []
+    for resolution in resolutions:
+        macs = count_macs(eager_model, (1, 3, resolution, resolution))
+        for batch_size in batch_sizes:
+            try:
+                row = benchmark(model, batch_size, resolution, device=device, warmup=warmup, iters=iters)
+            except torch.cuda.OutOfMemoryError:
+                print(f"batch {batch_size} @ {resolution}: out of memory")
+                continue
+            row = {**info, "macs_per_image": macs, **row}
+            rows.append(row)
+            print(f"batch {batch_size:>3} @ {resolution:>4}: p50 {row['p50_ms']:8.2f} ms, p90 {row['p90_ms']:8.2f} ms, "
+                  f"p99 {row['p99_ms']:8.2f} ms, {row['throughput_fps']:8.1f} img/s, peak {row['peak_memory_mb']:.0f} MB")
+    return rows
+
+
+def save_results(rows: list, path: str) -> None:
+    """Write to ``.json`` (a list of rows) or ``.csv``; CSV files are appended to so runs accumulate."""
+    if path.endswith(".csv"):
+        write_header = not os.path.exists(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+def main(args):
+    from ResEViT_Road import fuse_for_inference
+    from models import get_model
+
+    model = get_model(args.model_name, args.model_size, num_classes=args.num_classes).to(args.device).eval()
+    if args.fuse:
+        model = fuse_for_inference(model)
+    runner = model
+    if args.backend != "torch":
+        runner = create_backend(args.backend, model, device=args.device, image_size=args.resolutions[0],
+                                max_batch_size=max(args.batch_sizes))
+    print(f"Model: {args.model_name} {args.model_size}, backend: {args.backend}, device: {args.device}")
+    rows = run_grid(runner, args.batch_sizes, args.resolutions, device=args.device, warmup=args.warmup,
+                    iters=args.iters, eager_model=model, model_name=f"{args.model_name}_{args.model_size}",
+                    backend=args.backend, fused=args.fuse)
+    print(f"params: {rows[0]['params'] / 1e6:.2f} M, MACs @ {rows[0]['resolution']}: {rows[0]['macs_per_image'] / 1e9:.2f} G"
+          if rows else "No result")
+    if args.output and rows:
+        save_results(rows, args.output)
+        print(f"Saved {len(rows)} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Latency / throughput benchmark over batch sizes and resolutions')
+    parser.add_argument('--model_name', type=str, default="resevit_road", help='Model name, see models.MODEL_REGISTRY')
+    parser.add_argument('--model_size', type=str, default="standard", help='Model size to use')
+    parser.add_argument('--num_classes', type=int, default=7, help='The number of class of dataset')
+    parser.add_argument('--device', type=str, default="cuda" if torch.cuda.is_available() else "cpu", help='Device to use')
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 2, 4, 8], help='Batch sizes of the grid')
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[224], help='Input resolutions of the grid')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed iterations before each measurement')
+    parser.add_argument('--iters', type=int, default=200, help='Timed iterations of each measurement')
+    parser.add_argument('--fuse', action='store_true', help='Fold BatchNorm into the preceding convs')
+    parser.add_argument('--backend', type=str, default="torch", choices=BACKENDS, help='Inference backend')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to a .json or .csv (appended) file')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,41 @@
+import argparse
+
+import torch
+
+from ResEViT_Road.calibration import expected_calibration_error, fit_class_thresholds, fit_temperature, save_calibration
+from evaluation import evaluate, load_labelled_folder
+from predict import BAD_ROAD_CLASSES, load_model
+from preprocess import Preprocessor
+
+
+def main(args):
+    model = load_model(args.checkpoint, num_classes=args.num_classes).to(args.device)
+    samples = load_labelled_folder(args.eval_dir)
+    result = evaluate(model, samples, Preprocessor(args.image_size), args.batch_size, device=args.device)
+    logits, labels = result["logits"], result["labels"]
+
+    temperature = fit_temperature(logits, labels)
+    probs = (logits / temperature).softmax(dim=1)
+    thresholds = fit_class_thresholds(probs, labels, BAD_ROAD_CLASSES, target_precision=args.target_precision)
+    print(f"{len(samples)} frames, accuracy {result['accuracy']:.4f}")
+    print(f"temperature {temperature:.3f}, ECE {expected_calibration_error(logits.softmax(dim=1), labels):.4f} "
+          f"-> {expected_calibration_error(probs, labels):.4f}")
+    for c, threshold in thresholds.items():
+        print(f"class {c}: upload threshold {threshold:.3f} for precision >= {args.target_precision}")
+    save_calibration(args.output, temperature, thresholds, checkpoint=args.checkpoint,
+                     target_precision=args.target_precision)
+    print(f"Saved to {args.output}, use it with predict.py --calibration {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit the softmax temperature and per-class upload thresholds')
+    parser.add_argument('--checkpoint', type=str, required=True, help='Path to the model state dict')
+    parser.add_argument('--num_classes', type=int, default=7, help='Number of classes of the checkpoint')
+    parser.add_argument('--eval_dir', type=str, required=True, help='Validation set laid out as <class>/<image>')
+    parser.add_argument('--target_precision', type=float, default=0.9, help='Precision each bad-road class must reach to be uploaded')
+    parser.add_argument('--output', type=str, default="calibration.json", help='Calibration file')
+    parser.add_argument('--image_size', type=int, default=224, help='Model input resolution')
+    parser.add_argument('--batch_size', type=int, default=16, help='Evaluation batch size')
+    parser.add_argument('--device', type=str, default="cuda" if torch.cuda.is_available() else "cpu", help='Device to run on')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,255 @@
+import threading
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+__all__ = ["SyntheticSource", "gstreamer_csi_pipeline", "gstreamer_v4l2_pipeline", "open_source", "CameraCapture"]
+
+
+class SyntheticSource:
+    """Stand-in for ``cv2.VideoCapture`` producing a moving test pattern at ``fps``.
+
+    Every ``scene_length`` frames the pattern changes, so the frame gate sees
+    both static and changing scenes.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0, scene_length: int = 30):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.scene_length = scene_length
+        self._index = 0
+        self._next_time = None
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image: Optional[np.ndarray] = None) -> tuple:
+        if not self._opened:
+            return False, image
+        if self.fps:
+            now = time.monotonic()
+            self._next_time = now if self._next_time is None else self._next_time
+            time.sleep(max(0.0, self._next_time - now))
+            self._next_time += 1.0 / self.fps
+        shape = (self.height, self.width, 3)
+        if image is None or image.shape != shape or image.dtype != np.uint8:
+            image = np.empty(shape, dtype=np.uint8)
+        scene = self._index // self.scene_length
+        image[:] = (scene * 40 % 256, scene * 90 % 256, scene * 150 % 256)
+        x = self._index * 8 % self.width
+        image[self.height // 4: self.height // 2, x: x + self.width // 8] = 255
+        self._index += 1
+        return True, image
+
+    def release(self) -> None:
+        self._opened = False
+
+
+def gstreamer_csi_pipeline(sensor_id: int = 0, capture_width: int = 1920, capture_height: int = 1080,
+                           width: int = 1280, height: int = 720, fps: int = 30, flip: int = 0) -> str:
+    """CSI camera through the Jetson ISP; ``nvvidconv`` downscales to ``width x height`` in hardware."""
+    return (
+        f"nvarguscamerasrc sensor-id={sensor_id} ! "
+        f"video/x-raw(memory:NVMM), width={capture_width}, height={capture_height}, framerate={fps}/1 ! "
+        f"nvvidconv flip-method={flip} ! video/x-raw, width={width}, height={height}, format=BGRx ! "
+        "videoconvert ! video/x-raw, format=BGR ! appsink drop=true max-buffers=1 sync=false"
+    )
+
+
+def gstreamer_v4l2_pipeline(device: str = "/dev/video0", capture_width: int = 1920, capture_height: int = 1080,
+                            width: int = 1280, height: int = 720, fps: int = 30, mjpeg: bool = True) -> str:
+    """USB (V4L2) camera; MJPEG is decoded by ``nvv4l2decoder`` and downscaled by ``nvvidconv``."""
+    if mjpeg:
+        source = (f"v4l2src device={device} io-mode=2 ! "
+                  f"image/jpeg, width={capture_width}, height={capture_height}, framerate={fps}/1 ! "
+                  "nvv4l2decoder mjpeg=1 ! ")
+    else:
+        source = (f"v4l2src device={device} ! "
+                  f"video/x-raw, width={capture_width}, height={capture_height}, framerate={fps}/1 ! ")
+    return (
+        source + f"nvvidconv ! video/x-raw, width={width}, height={height}, format=BGRx ! "
+        "videoconvert ! video/x-raw, format=BGR ! appsink drop=true max-buffers=1 sync=false"
+    )
+
+
+def open_source(source: str, width: Optional[int] = None, height: Optional[int] = None, fps: int = 30):
+    """Open a frame source from its command line form.
+
+    ``0``: camera index through OpenCV (V4L2 on Linux). ``csi:<sensor_id>`` and
+    ``v4l2:<device>``: GStreamer pipelines, downscaled to ``width x height``
+    (default 1280x720) in the pipeline. ``gst:<pipeline>``: any GStreamer
+    pipeline ending in an appsink. ``synthetic``: a generated test pattern.
+    Anything else is opened as a video file or stream URL.
+    """
+    source = str(source)
+    if source.isdigit():
+        cap = cv2.VideoCapture(int(source))
+        # keep the driver queue short so frames are not stale
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if width and height:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        return cap
+    if source == "synthetic":
+        return SyntheticSource(width or 640, height or 480, fps)
+    kind, _, value = source.partition(":")
+    size = {"width": width or 1280, "height": height or 720}
+    if kind == "csi":
+        return cv2.VideoCapture(gstreamer_csi_pipeline(int(value or 0), fps=fps, **size), cv2.CAP_GSTREAMER)
+    if kind == "v4l2":
+        return cv2.VideoCapture(gstreamer_v4l2_pipeline(value or "/dev/video0", fps=fps, **size), cv2.CAP_GSTREAMER)
+    if kind == "gst":
+        return cv2.VideoCapture(value, cv2.CAP_GSTREAMER)
+    return cv2.VideoCapture(source)
+
+
+class CameraCapture:
+    """Read frames on a background thread into a fixed ring of preallocated buffers.
+
+    The thread decodes every frame straight into a ring slot with
+    ``cap.read(image=slot)`` and publishes it as the latest frame; ``read``
+    hands out only the latest one, so a slow consumer gets fresh frames and
+    the older ones are counted as dropped instead of queueing up.
+
+    Frames are returned without a copy. A slot is reused only once it is the
+    least recently handed out one, so the ``num_buffers - 2`` frames handed out
+    last stay valid: the ring must be larger than the number of frames in
+    flight downstream, like the ``Preprocessor`` ring.
+
+    ``realtime`` paces file sources at their own frame rate, as a camera would;
+    ``loop`` restarts them at the end.
+    """
+
+    def __init__(self, cap, num_buffers: int = 8, realtime: bool = True, loop: bool = False):
+        assert num_buffers >= 3, "num_buffers must be at least 3"
+        self.cap = cap
+        self.num_buffers = num_buffers
+        self.loop = loop
+        fps = cap.get(cv2.CAP_PROP_FPS) if isinstance(cap, cv2.VideoCapture) else 0
+        self._is_file = isinstance(cap, cv2.VideoCapture) and cap.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+        self._interval = 1.0 / fps if realtime and self._is_file and fps > 0 else 0.0
+
+        self._buffers = None
+        self._timestamps = [0.0] * num_buffers
+        # slots ordered by when they were last handed out, oldest first
+        self._order = list(range(num_buffers))
+        self._latest = None
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.finished = False
+
+        self.captured = 0
+        self.delivered = 0
+        self.failures = 0
+        self._age_sum = 0.0
+        self._last_age = 0.0
+
+    @classmethod
+    def open(cls, source: str, width: Optional[int] = None, height: Optional[int] = None, fps: int = 30,
+             **kwargs) -> "CameraCapture":
+        return cls(open_source(source, width, height, fps), **kwargs)
+
+    def start(self) -> "CameraCapture":
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._available:
+            self._available.notify_all()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        self.cap.release()
+
+    def _next_slot(self) -> int:
+        with self._lock:
+            return next(i for i in self._order if i != self._latest)
+
+    def _grab(self, slot: int) -> bool:
+        if self._buffers is None:
+            ret, frame = self.cap.read()
+            if not ret:
+                return False
+            self._buffers = [np.empty_like(frame) for _ in range(self.num_buffers)]
+            np.copyto(self._buffers[slot], frame)
+            return True
+        buffer = self._buffers[slot]
+        ret, frame = self.cap.read(image=buffer)
+        if not ret:
+            return False
+        if frame is not buffer and frame.ctypes.data != buffer.ctypes.data:
+            if frame.shape != buffer.shape:
+                # the source changed resolution, e.g. a stream renegotiated its caps
+                with self._lock:
+                    self._buffers = [np.empty_like(frame) for _ in range(self.num_buffers)]
+                    self._latest = None
+                buffer = self._buffers[slot]
+            np.copyto(buffer, frame)
+        return True
+
+    def _run(self) -> None:
+        next_time = time.monotonic()
+        while not self._stop_event.is_set():
+            slot = self._next_slot()
+            if not self._grab(slot):
+                if self._is_file:
+                    if not self.loop:
+                        break
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                self.failures += 1
+                self._stop_event.wait(0.01)
+                continue
+            with self._available:
+                self._timestamps[slot] = time.time()
+                self._latest = slot
+                self.captured += 1
+                self._available.notify_all()
+            if self._interval:
+                next_time += self._interval
+                self._stop_event.wait(max(0.0, next_time - time.monotonic()))
+        self.finished = True
+        with self._available:
+            self._available.notify_all()
+
+    def read(self, timeout: Optional[float] = 1.0) -> tuple:
+        """Wait for a frame newer than the last one read; ``(frame, timestamp)`` or ``(None, None)`` on timeout."""
+        with self._available:
+            # a finished file source waits out the timeout instead of letting the caller spin
+            if not self._available.wait_for(lambda: self._latest is not None or self._stop_event.is_set(), timeout) \
+                    or self._latest is None:
+                return None, None
+            slot, self._latest = self._latest, None
+            self._order.remove(slot)
+            self._order.append(slot)
+            timestamp = self._timestamps[slot]
+            self.delivered += 1
+            self._last_age = time.time() - timestamp
+            self._age_sum += self._last_age
+            return self._buffers[slot], timestamp
+
+    @property
+    def dropped(self) -> int:
+        """Frames captured but never read, replaced by a newer one first."""
+        pending = 1 if self._latest is not None else 0
+        return self.captured - self.delivered - pending
+
+    def stats(self) -> dict:
+        """``age`` is the time between the capture of a frame and its ``read``, in seconds."""
+        return {
+            "captured": self.captured,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "last_age": self._last_age,
+            "avg_age": self._age_sum / self.delivered if self.delivered else 0.0,
+        }
@@ -0,0 +1,108 @@
+import functools
+import hashlib
+import os
+import sys
+from itertools import chain
+from typing import Optional
+
+import torch
+from torch import nn
+from torch.nn.modules.utils import consume_prefix_in_state_dict_if_present
+
+from ResEViT_Road.export import export_torchscript
+
+__all__ = ["load_state_dict", "build_from_checkpoint", "source_fingerprint", "artifact_path", "save_artifact",
+           "load_artifact"]
+
+
+def load_state_dict(path: str, prefix: str = "model.") -> dict:
+    """Memory-mapped state dict of a ``.safetensors`` or ``.pt`` checkpoint, with ``prefix`` stripped from the keys.
+
+    Tensors stay backed by the file until they are first touched; renaming the
+    keys does not copy them.
+    """
+    if path.endswith(".safetensors"):
+        from safetensors.torch import load_file
+
+        state_dict = load_file(path, device="cpu")
+    else:
+        try:
+            state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        except RuntimeError:
+            # files written before the zip format (torch < 1.6) cannot be memory-mapped
+            state_dict = torch.load(path, map_location="cpu", weights_only=True)
+    if "state_dict" in state_dict and isinstance(state_dict["state_dict"], dict):
+        state_dict = state_dict["state_dict"]
+    consume_prefix_in_state_dict_if_present(state_dict, prefix)
+    return state_dict
+
+
+def build_from_checkpoint(factory, path: str, device="cpu", prefix: str = "model.") -> nn.Module:
+    """``factory()`` built on the meta device and given the checkpoint tensors directly.
+
+    Skips the random initialisation of every layer and the copy into it.
+    Missing or unexpected keys raise as with ``load_state_dict(strict=True)``;
+    non-persistent buffers, which checkpoints never contain and so stay on the
+    meta device, make it fall back to a regular build.
+    """
+    state_dict = load_state_dict(path, prefix)
+    with torch.device("meta"):
+        model = factory()
+    model.load_state_dict(state_dict, assign=True)
+    if any(t.is_meta for t in chain(model.parameters(), model.buffers())):
+        model = factory()
+        model.load_state_dict(state_dict)
+    return model.to(device).eval()
+
+
+@functools.lru_cache(maxsize=None)
+def source_fingerprint(package: str) -> str:
+    """Hash of the ``.py`` sources of an imported top-level ``package``, e.g. ``ResEViT_Road``."""
+    root = os.path.dirname(os.path.abspath(sys.modules[package].__file__))
+    digest = hashlib.sha1()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def artifact_path(checkpoint: str, cache_dir: str, *options, traced: bool = False, model_class=None) -> str:
+    """Deployment artifact of ``checkpoint`` prepared with ``options``.
+
+    The name changes with the checkpoint file, the torch version, the options
+    and the source of the package defining ``model_class`` (a pickled artifact
+    refers to those classes), so a new checkpoint, setting or model code never
+    reuses a stale artifact.
+    """
+    stat = os.stat(checkpoint)
+    code = source_fingerprint(model_class.__module__.split(".")[0]) if model_class is not None else None
+    key = (os.path.abspath(checkpoint), stat.st_size, stat.st_mtime_ns, torch.__version__, code, options)
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    extension = ".deploy.ts" if traced else ".deploy.pt"
+    return os.path.join(cache_dir, f"{os.path.splitext(os.path.basename(checkpoint))[0]}-{digest}{extension}")
+
+
+def save_artifact(model: nn.Module, path: str, sample_inputs: Optional[torch.Tensor] = None) -> None:
+    """Save the whole prepared (fused, cast, quantized...) module, it loads back without rebuilding anything.
+
+    The module is pickled, except for ``.ts`` paths which get a frozen trace
+    on ``sample_inputs``; statically quantized modules can only be saved that way.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".ts"):
+        export_torchscript(model, path + ".tmp", sample_inputs)
+    else:
+        torch.save(model, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def load_artifact(path: str, device="cpu") -> nn.Module:
+    if path.endswith(".ts"):
+        return torch.jit.load(path, map_location=device).eval()
+    # a full pickle, only load artifacts written by save_artifact
+    return torch.load(path, map_location=device, mmap=True, weights_only=False).eval()
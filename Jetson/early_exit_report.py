@@ -0,0 +1,48 @@
+import argparse
+
+import torch
+
+from evaluation import evaluate, load_labelled_folder
+from predict import EASY_ROAD_CLASSES, load_model
+from preprocess import Preprocessor
+
+
+def main(args):
+    model = load_model(args.checkpoint, num_classes=args.num_classes, exit_stages=args.exit_stages).to(args.device)
+    preprocessor = Preprocessor(args.image_size)
+    samples = load_labelled_folder(args.eval_dir)
+    hard_classes = [c for c in range(args.num_classes) if c not in args.exit_classes]
+    print(f"{len(samples)} evaluation frames, exits after stages {[i + 1 for i in args.exit_stages]}, "
+          f"early exit allowed for classes {args.exit_classes}")
+
+    exit_names = [f"exit{i + 1}" for i in args.exit_stages] + ["final"]
+    print(f"{'threshold':>9} {'accuracy':>9} {'hard acc':>9} {'ms/frame':>9} " + " ".join(f"{n:>7}" for n in exit_names))
+    # None runs the full model: the reference accuracy and latency
+    for threshold in [None] + args.thresholds:
+        model.set_early_exit(threshold, args.exit_classes)
+        model.exit_counts.clear()
+        result = evaluate(model, samples, preprocessor, args.batch_size, device=args.device)
+        preds, labels = result["logits"].argmax(dim=1), result["labels"]
+        hard = torch.isin(labels, torch.as_tensor(hard_classes))
+        hard_accuracy = (preds[hard] == labels[hard]).float().mean().item() if hard.any() else float("nan")
+        counts = [model.exit_counts.get(i, 0) for i in args.exit_stages] + [model.exit_counts.get(-1, 0)]
+        if threshold is None:
+            counts[-1] = len(samples)
+        rates = " ".join(f"{count / len(samples):>7.1%}" for count in counts)
+        name = "full" if threshold is None else f"{threshold:.2f}"
+        print(f"{name:>9} {result['accuracy']:>9.4f} {hard_accuracy:>9.4f} {result['ms_per_frame']:>9.2f} {rates}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Accuracy and latency of ResEViT early exit against the confidence threshold')
+    parser.add_argument('--checkpoint', type=str, required=True, help='State dict trained with exit heads (EarlyExitTrainer)')
+    parser.add_argument('--num_classes', type=int, default=7, help='Number of classes of the checkpoint')
+    parser.add_argument('--eval_dir', type=str, required=True, help='Held-out set laid out as <class>/<image>')
+    parser.add_argument('--exit_stages', type=int, nargs='+', default=[1, 2], help='0-based stages followed by an exit head')
+    parser.add_argument('--exit_classes', type=int, nargs='+', default=EASY_ROAD_CLASSES, help='Classes allowed to exit early')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.99, 0.98, 0.95, 0.9, 0.85, 0.8], help='Confidence thresholds to sweep')
+    parser.add_argument('--image_size', type=int, default=224, help='Model input resolution')
+    parser.add_argument('--batch_size', type=int, default=1, help='Evaluation batch size, 1 matches the per-frame latency on the device')
+    parser.add_argument('--device', type=str, default="cuda" if torch.cuda.is_available() else "cpu", help='Device to run on')
+    args = parser.parse_args()
+    main(args)
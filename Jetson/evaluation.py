@@ -0,0 +1,78 @@
+import os
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+
+from preprocess import Preprocessor
+
+__all__ = ["list_frames", "load_labelled_folder", "iter_batches", "evaluate"]
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_frames(root: str, limit: Optional[int] = None) -> list:
+    """Image paths under ``root`` (recursively), sorted."""
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS))
+    paths.sort()
+    return paths[:limit] if limit else paths
+
+
+def load_labelled_folder(root: str) -> list:
+    """``(path, label)`` pairs from a ``root/<class>/<image>`` folder.
+
+    Class folders named by the class index (``0`` .. ``6``) map to that index,
+    otherwise the sorted folder names give the index, like torchvision's ImageFolder.
+    """
+    classes = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    by_index = all(c.isdigit() for c in classes)
+    samples = []
+    for i, class_name in enumerate(classes):
+        label = int(class_name) if by_index else i
+        samples.extend((path, label) for path in list_frames(os.path.join(root, class_name)))
+    return samples
+
+
+def iter_batches(paths: list, preprocessor: Preprocessor, batch_size: int = 16):
+    """Yield ``(N, 3, H, W)`` model inputs read from ``paths``."""
+    for i in range(0, len(paths), batch_size):
+        frames = []
+        for path in paths[i:i + batch_size]:
+            frame = cv2.imread(path)
+            if frame is None:
+                raise IOError(f"Cannot read {path}")
+            frames.append(frame)
+        yield preprocessor.batch(frames)
+
+
+@torch.no_grad()
+def evaluate(model, samples: list, preprocessor: Preprocessor, batch_size: int = 16, device="cpu") -> dict:
+    """Accuracy and latency of ``model`` on ``(path, label)`` samples; ``logits`` and ``labels`` are kept for later analysis."""
+    model.eval()
+    paths, labels = zip(*samples)
+    logits, latencies = [], []
+    for batch in iter_batches(list(paths), preprocessor, batch_size):
+        batch = batch.to(device)
+        start_time = time.perf_counter()
+        output = model(batch)
+        if batch.is_cuda:
+            torch.cuda.synchronize()
+        latencies.append((time.perf_counter() - start_time) / len(batch))
+        logits.append(output.float().cpu())
+    logits = torch.cat(logits)
+    labels = torch.as_tensor(labels)
+    preds = logits.argmax(dim=1)
+    per_class = {
+        int(c): (preds[labels == c] == c).float().mean().item() for c in labels.unique()
+    }
+    return {
+        "accuracy": (preds == labels).float().mean().item(),
+        "per_class_accuracy": per_class,
+        "ms_per_frame": float(np.mean(latencies)) * 1000,
+        "logits": logits,
+        "labels": labels,
+    }
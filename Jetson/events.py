@@ -0,0 +1,177 @@
+import collections
+from typing import Optional
+
+import numpy as np
+
+from gps import distance_m
+
+__all__ = ["RoadEvent", "EventAggregator"]
+
+
+class RoadEvent:
+    """One road defect segment: consecutive frames whose smoothed bad-road probability stayed high."""
+
+    def __init__(self, timestamp: float, location: Optional[tuple]):
+        self.start_time = self.end_time = timestamp
+        self.start_location = self.end_location = location
+        self.num_frames = 0
+        self.class_scores = None
+        self.confidence_sum = 0.0
+        self.best_confidence = -1.0
+        self.best_frame = None
+        self.best_timestamp = timestamp
+        self.best_location = location
+
+    def add(self, probs: np.ndarray, bad_confidence: float, frame: np.ndarray, timestamp: float,
+            location: Optional[tuple]) -> None:
+        self.num_frames += 1
+        self.class_scores = probs.copy() if self.class_scores is None else self.class_scores + probs
+        self.confidence_sum += bad_confidence
+        self.end_time = timestamp
+        if location is not None:
+            self.end_location = location
+            self.start_location = self.start_location or location
+        if bad_confidence > self.best_confidence:
+            self.best_confidence = bad_confidence
+            # the capture buffer may be reused for a later frame
+            self.best_frame = frame.copy()
+            self.best_timestamp = timestamp
+            self.best_location = location
+
+    def merge(self, other: "RoadEvent") -> None:
+        self.num_frames += other.num_frames
+        self.class_scores = self.class_scores + other.class_scores
+        self.confidence_sum += other.confidence_sum
+        self.end_time = other.end_time
+        self.end_location = other.end_location or self.end_location
+        if other.best_confidence > self.best_confidence:
+            self.best_confidence = other.best_confidence
+            self.best_frame = other.best_frame
+            self.best_timestamp = other.best_timestamp
+            self.best_location = other.best_location
+
+    @property
+    def confidence(self) -> float:
+        """Mean smoothed bad-road probability over the frames of the event."""
+        return self.confidence_sum / max(self.num_frames, 1)
+
+    def label(self, bad_classes) -> int:
+        """Bad-road class with the highest summed probability."""
+        return int(max(bad_classes, key=lambda c: self.class_scores[c]))
+
+    def __repr__(self):
+        return (f"RoadEvent({self.end_time - self.start_time:.1f}s, {self.num_frames} frames, "
+                f"confidence={self.confidence:.2f}, location={self.best_location})")
+
+
+class EventAggregator:
+    """Turn per-frame class probabilities into one event per road defect segment.
+
+    The probabilities are averaged over the last ``window`` frames. An event
+    opens when the smoothed probability of the ``bad_classes`` reaches
+    ``on_threshold`` and closes when it drops below ``off_threshold``
+    (hysteresis, so a segment flickering around one threshold stays one event).
+    A closed event is held back and merged with the next one if that one
+    starts within ``merge_distance_m`` (or ``merge_gap`` seconds without GPS);
+    it is emitted once the vehicle is farther or later than that. Each event
+    keeps only its most confident frame.
+
+    An event longer than ``max_event_seconds`` or ``max_event_distance_m``
+    (merged events included) is emitted while still open and a new one
+    continues from the next frame, so a long damaged stretch is uploaded in
+    pieces as it is driven instead of once at the end. None disables a limit.
+    """
+
+    def __init__(self, bad_classes, window: int = 5, on_threshold: float = 0.6, off_threshold: float = 0.4,
+                 merge_distance_m: float = 20.0, merge_gap: float = 5.0, max_event_seconds: Optional[float] = 30.0,
+                 max_event_distance_m: Optional[float] = 200.0):
+        assert off_threshold <= on_threshold, "off_threshold must not exceed on_threshold"
+        self.bad_classes = list(bad_classes)
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.merge_distance_m = merge_distance_m
+        self.merge_gap = merge_gap
+        self.max_event_seconds = max_event_seconds
+        self.max_event_distance_m = max_event_distance_m
+        self._history = collections.deque(maxlen=window)
+        self._last_probs = None
+        self._current = None
+        self._pending = None
+        # the last event was split at a limit: the next frame continues it if it is still above off_threshold
+        self._split = False
+
+        self.frames = 0
+        self.emitted = 0
+
+    def _close_enough(self, event: RoadEvent, timestamp: float, location: Optional[tuple]) -> bool:
+        if location is not None and event.end_location is not None:
+            return distance_m(location, event.end_location) <= self.merge_distance_m
+        return timestamp - event.end_time <= self.merge_gap
+
+    def _too_long(self, first: RoadEvent, last: RoadEvent) -> bool:
+        """Whether the span from the start of ``first`` to the end of ``last`` exceeds a limit."""
+        if self.max_event_seconds is not None and last.end_time - first.start_time >= self.max_event_seconds:
+            return True
+        if self.max_event_distance_m is None or first.start_location is None or last.end_location is None:
+            return False
+        return distance_m(first.start_location, last.end_location) >= self.max_event_distance_m
+
+    def update(self, probs: Optional[np.ndarray], frame: np.ndarray, timestamp: float,
+               location: Optional[tuple] = None) -> list:
+        """Add one frame and return the events that are complete.
+
+        ``probs`` is the softmax output of the frame; None repeats the previous
+        frame's (frames skipped by the gate).
+        """
+        if probs is None:
+            if self._last_probs is None:
+                return []
+            probs = self._last_probs
+        self._last_probs = probs
+        self.frames += 1
+        self._history.append(probs)
+        smoothed = np.mean(self._history, axis=0)
+        bad_confidence = float(smoothed[self.bad_classes].sum())
+
+        emitted = []
+        if self._pending is not None and self._current is None and not self._close_enough(self._pending, timestamp, location):
+            emitted.append(self._pending)
+            self._pending = None
+
+        if self._current is None:
+            threshold = self.off_threshold if self._split else self.on_threshold
+            self._split = False
+            if bad_confidence >= threshold:
+                self._current = RoadEvent(timestamp, location)
+        if self._current is not None:
+            if bad_confidence < self.off_threshold:
+                self._close()
+            else:
+                self._current.add(smoothed, bad_confidence, frame, timestamp, location)
+                if self._too_long(self._pending or self._current, self._current):
+                    self._close()
+                    emitted.append(self._pending)
+                    self._pending = None
+                    self._split = True
+        self.emitted += len(emitted)
+        return emitted
+
+    def _close(self) -> None:
+        event, self._current = self._current, None
+        if self._pending is not None:
+            # started close to where the previous one ended: one defect segment
+            self._pending.merge(event)
+        else:
+            self._pending = event
+
+    def flush(self) -> list:
+        """Close and return everything still open, e.g. at shutdown."""
+        if self._current is not None:
+            self._close()
+        emitted = [self._pending] if self._pending is not None else []
+        self._pending = None
+        self.emitted += len(emitted)
+        return emitted
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "events": self.emitted, "open": self._current is not None}
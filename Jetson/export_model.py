@@ -0,0 +1,50 @@
+import argparse
+
+import torch
+
+from ResEViT_Road import fuse_for_inference
+from ResEViT_Road.export import export_onnx, export_torchscript
+from backends import OnnxRuntimeBackend, TorchScriptBackend, check_backend
+from models import get_model
+from predict import load_model
+
+
+def main(args):
+    if args.checkpoint:
+        model = load_model(args.checkpoint, num_classes=args.num_classes, model_name=args.model_name,
+                           model_size=args.model_size).cpu()
+    else:
+        model = get_model(args.model_name, args.model_size, num_classes=args.num_classes)
+    model = fuse_for_inference(model.eval())
+    sample_inputs = torch.randn(1, 3, args.image_size, args.image_size)
+
+    if args.format == "onnx":
+        export_onnx(model, args.output, sample_inputs, simplify=not args.no_simplify, opset=args.opset)
+        backend = OnnxRuntimeBackend(args.output, providers=["CPUExecutionProvider"])
+    else:
+        export_torchscript(model, args.output, sample_inputs)
+        backend = TorchScriptBackend(args.output)
+    print(f"Exported {args.model_name} {args.model_size} to {args.output}")
+
+    # round trip on CPU, with other batch sizes and resolutions than the traced one
+    sizes = [args.image_size] + args.check_sizes
+    shapes = [(batch_size, 3, size, size) for size in sizes for batch_size in (1, 2)]
+    diff = check_backend(model, backend, shapes, atol=args.atol)
+    print(f"Round trip OK on {len(shapes)} input shapes, max abs diff: {diff:.2e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export a model to ONNX or TorchScript')
+    parser.add_argument('--model_name', type=str, default="resevit_road", help='Model name, see models.MODEL_REGISTRY')
+    parser.add_argument('--model_size', type=str, default="standard", help='Model size to use')
+    parser.add_argument('--num_classes', type=int, default=7, help='The number of class of dataset')
+    parser.add_argument('--checkpoint', type=str, default=None, help='ResEViT state dict to export, random weights if omitted')
+    parser.add_argument('--format', type=str, default="onnx", choices=["onnx", "torchscript"], help='Export format')
+    parser.add_argument('--output', type=str, default="resevit_road.onnx", help='Exported file')
+    parser.add_argument('--image_size', type=int, default=224, help='Resolution of the sample input')
+    parser.add_argument('--check_sizes', type=int, nargs='*', default=[288], help='Extra resolutions of the round-trip check')
+    parser.add_argument('--opset', type=int, default=17, help='ONNX opset')
+    parser.add_argument('--no_simplify', action='store_true', help='Skip onnx-simplifier')
+    parser.add_argument('--atol', type=float, default=1e-4, help='Tolerance of the round-trip check')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,94 @@
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from gps import distance_m
+
+__all__ = ["GATE_METHODS", "frame_signature", "signature_distance", "FrameGate"]
+
+GATE_METHODS = ("diff", "dhash")
+
+
+def frame_signature(frame: np.ndarray, method: str = "diff", size: int = 32) -> np.ndarray:
+    """Cheap fingerprint of a BGR frame.
+
+    ``diff``: ``size x size`` grayscale thumbnail. ``dhash``: 64-bit difference
+    hash (sign of the horizontal gradient of a 9x8 thumbnail), robust to
+    exposure changes.
+    """
+    if method == "dhash":
+        small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+        return gray[:, 1:] > gray[:, :-1]
+    small = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray, method: str = "diff") -> float:
+    """Mean absolute difference in [0, 1] for ``diff``, Hamming distance in bits for ``dhash``."""
+    if method == "dhash":
+        return float(np.count_nonzero(a != b))
+    return float(cv2.absdiff(a, b).mean()) / 255
+
+
+class FrameGate:
+    """Decide which frames go through the model; the others reuse the last prediction.
+
+    A frame is skipped when it looks like the last inferred frame (signature
+    distance below ``threshold``) or when the vehicle has moved less than
+    ``min_distance_m`` since that frame (only while GPS has a fix). A frame is
+    always inferred once ``max_interval`` seconds have passed since the last
+    inferred one, so a wrong reused prediction cannot last.
+    """
+
+    def __init__(self, method: str = "diff", threshold: Optional[float] = None, min_distance_m: float = 0.0,
+                 max_interval: float = 2.0):
+        assert method in GATE_METHODS, f"method must be one of {GATE_METHODS}"
+        self.method = method
+        # ~4% mean gray-level change, or 5 of the 64 hash bits
+        self.threshold = threshold if threshold is not None else (5 if method == "dhash" else 0.04)
+        self.min_distance_m = min_distance_m
+        self.max_interval = max_interval
+
+        self._signature = None
+        self._location = None
+        self._time = None
+        self.last_prediction = None
+
+        self.frames = 0
+        self.inferred = 0
+        self.skipped_static = 0
+        self.skipped_stationary = 0
+
+    def __call__(self, frame: np.ndarray, location: Optional[tuple] = None, timestamp: Optional[float] = None) -> bool:
+        """True if ``frame`` must be inferred."""
+        timestamp = time.time() if timestamp is None else timestamp
+        signature = frame_signature(frame, self.method)
+        self.frames += 1
+        if self._signature is not None and timestamp - self._time < self.max_interval:
+            if signature_distance(signature, self._signature, self.method) < self.threshold:
+                self.skipped_static += 1
+                return False
+            if (self.min_distance_m > 0 and location is not None and self._location is not None
+                    and distance_m(location, self._location) < self.min_distance_m):
+                self.skipped_stationary += 1
+                return False
+        self._signature = signature
+        self._location = location
+        self._time = timestamp
+        self.inferred += 1
+        return True
+
+    def stats(self) -> dict:
+        """``duty_cycle`` is the share of frames that ran through the model."""
+        skipped = self.skipped_static + self.skipped_stationary
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped_static": self.skipped_static,
+            "skipped_stationary": self.skipped_stationary,
+            "skip_rate": skipped / self.frames if self.frames else 0.0,
+            "duty_cycle": self.inferred / self.frames if self.frames else 1.0,
+        }
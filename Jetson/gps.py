@@ -0,0 +1,219 @@
+import bisect
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import serial
+
+__all__ = ["GPSFix", "GPSReader", "convert_to_decimal", "distance_m", "parse_cgpsinfo"]
+
+CGPSINFO_PATTERN = re.compile(r'\+CGPSINFO: ([^,]*),([NSns]),([^,]*),([EWew]),')
+EARTH_RADIUS_M = 6371000.0
+
+
+def convert_to_decimal(coord_str, hemisphere_str, is_latitude=True):
+    try:
+        if is_latitude:
+            degrees = int(coord_str[:2])
+            minutes = float(coord_str[2:])
+        else:
+            degrees = int(coord_str[:3])
+            minutes = float(coord_str[3:])
+
+        decimal_coord = degrees + (minutes / 60)
+
+        if is_latitude and (hemisphere_str == 'S' or hemisphere_str == 's'):
+            decimal_coord *= -1
+        elif not is_latitude and (hemisphere_str == 'W' or hemisphere_str == 'w'):
+            decimal_coord *= -1
+
+        return decimal_coord
+    except (ValueError, IndexError): # Catch specific exceptions
+        return None
+
+
+def distance_m(a: tuple, b: tuple) -> float:
+    """Great-circle (haversine) distance in meters between two ``(lat, lon)`` in decimal degrees."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+
+def parse_cgpsinfo(response: str):
+    """Return ``(lat, lon)`` in decimal degrees from an ``AT+CGPSINFO`` response, or None without a fix."""
+    match = CGPSINFO_PATTERN.search(response)
+    if not match:
+        return None
+    lat_raw, lat_hemisphere, lon_raw, lon_hemisphere = match.groups()
+    if not (lat_raw and lon_raw):
+        return None
+    lat = convert_to_decimal(lat_raw, lat_hemisphere, is_latitude=True)
+    lon = convert_to_decimal(lon_raw, lon_hemisphere, is_latitude=False)
+    if lat is None or lon is None:
+        return None
+    return lat, lon
+
+
+class GPSFix:
+    __slots__ = ("lat", "lon", "timestamp")
+
+    def __init__(self, lat: float, lon: float, timestamp: float):
+        self.lat = lat
+        self.lon = lon
+        self.timestamp = timestamp
+
+    @property
+    def location(self) -> tuple:
+        return self.lat, self.lon
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def __repr__(self):
+        return f"GPSFix(lat={self.lat}, lon={self.lon}, age={self.age:.1f}s)"
+
+
+class GPSReader:
+    """Own the modem serial port and keep the latest ``+CGPSINFO`` fix in memory.
+
+    A background thread polls the modem and publishes every valid fix, stamped
+    with the local ``time.time()`` it was received at, so frame timestamps and
+    fixes share one clock. Readers never touch the serial port and never block.
+    The last ``track_size`` fixes are kept for ``location_at``.
+
+    The port is opened by the thread, which retries every ``retry_interval``
+    seconds until it succeeds or ``stop`` is called (the modem's tty may not
+    exist yet at boot), and reopens it if it fails later on.
+    """
+
+    def __init__(
+        self,
+        serial_port='/dev/ttyUSB2',
+        baudrate=115200,
+        poll_interval=1.0,
+        max_age=10.0,
+        track_size=120,
+        retry_interval=5.0,
+    ):
+        self.serial_port = serial_port
+        self.baudrate = baudrate
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.turn_on = True
+
+        self._track = deque(maxlen=track_size)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._serial = None
+
+    def start(self, turn_on=True) -> "GPSReader":
+        self.turn_on = turn_on
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="gps-reader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(self.poll_interval * 2)
+            self._thread = None
+
+    def _open(self) -> None:
+        self._serial = serial.Serial(self.serial_port, self.baudrate, timeout=self.poll_interval)
+        if self.turn_on:
+            self._stop_event.wait(1)
+            self._serial.write(b'AT+CGPS=1,1\r')
+            self._stop_event.wait(2)
+            self._serial.write(b'AT+CGPS=1\r')
+
+    def _close(self) -> None:
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    def _read_response(self) -> str:
+        # the modem answers with a few short lines ending in OK/ERROR
+        lines = []
+        deadline = time.monotonic() + self.poll_interval
+        while time.monotonic() < deadline:
+            line = self._serial.readline().decode(errors='ignore')
+            if not line:
+                break
+            lines.append(line)
+            if line.startswith(('OK', 'ERROR')):
+                break
+        return "".join(lines)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            if self._serial is None:
+                try:
+                    self._open()
+                except Exception as e:
+                    # keep running without location rather than stopping the inference loop
+                    print("GPS Error:", e)
+                    self._close()
+                    self._stop_event.wait(self.retry_interval)
+                    continue
+            start = time.monotonic()
+            try:
+                self._serial.reset_input_buffer()
+                self._serial.write(b'AT+CGPSINFO\r')
+                location = parse_cgpsinfo(self._read_response())
+                if location is not None:
+                    self.publish(*location)
+            except serial.SerialException as e:
+                # the modem went away, e.g. it reset: reopen the port
+                print("GPS Error:", e)
+                self._close()
+            except Exception as e:
+                print("GPS Error:", e)
+            self._stop_event.wait(max(0.0, self.poll_interval - (time.monotonic() - start)))
+        self._close()
+
+    def publish(self, lat: float, lon: float, timestamp: Optional[float] = None) -> None:
+        fix = GPSFix(lat, lon, time.time() if timestamp is None else timestamp)
+        with self._lock:
+            self._track.append(fix)
+
+    def latest(self) -> Optional[GPSFix]:
+        with self._lock:
+            return self._track[-1] if self._track else None
+
+    def location(self) -> Optional[tuple]:
+        """Latest ``(lat, lon)``, or None when there is no fix younger than ``max_age``."""
+        fix = self.latest()
+        if fix is None or fix.age > self.max_age:
+            return None
+        return fix.location
+
+    def location_at(self, timestamp: float) -> Optional[tuple]:
+        """Interpolate the position at ``timestamp`` along the recorded track.
+
+        Between two fixes the position is linearly interpolated; outside the
+        track the nearest fix is used if it is within ``max_age`` of ``timestamp``.
+        """
+        with self._lock:
+            track = list(self._track)
+        if not track:
+            return None
+        times = [fix.timestamp for fix in track]
+        i = bisect.bisect_left(times, timestamp)
+        if i == 0 or i == len(track):
+            nearest = track[0] if i == 0 else track[-1]
+            if abs(nearest.timestamp - timestamp) > self.max_age:
+                return None
+            return nearest.location
+        before, after = track[i - 1], track[i]
+        span = after.timestamp - before.timestamp
+        if span > self.max_age:
+            return None
+        w = (timestamp - before.timestamp) / span if span > 0 else 0.0
+        return before.lat + w * (after.lat - before.lat), before.lon + w * (after.lon - before.lon)
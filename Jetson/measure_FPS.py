@@ -1,72 +1,116 @@
 import torch
 import time
-
-from timm.models import InceptionV4
-
-from baseline import ResNet18,ResNet34,ResNet50, EfficientNetB1, EfficientNetB3,efficientvit_cls_b1,efficientvit_cls_b2,efficientvit_cls_b3,MobileVit_s,MobileViT_xs,MobileViT_xxs, Inception_v4
 import argparse
+import numpy as np
 from tqdm import tqdm
-from ResEViT_Road import ResEViT_road_cls
+from ResEViT_Road import ResEViT_road_cls, fuse_for_inference
+from batching import BatchInferenceEngine
+from benchmark import time_model
+from models import available_models, get_model
 
 def init_tensor():
     torch.cuda.empty_cache()
     tensor = torch.randn((1, 3, 224, 224))
     return tensor
-def measure_fps(model,tensor,num_frames=100,device="cuda"):
+def measure_fps(model,tensor,num_frames=100,device="cuda",warmup=20):
+    """Mean FPS with the device synchronized after every frame, see benchmark.py for the full report."""
     batch_size=tensor.shape[0]
+    model=model.to(device)
+    model.eval()
+    latencies=time_model(model,tensor.to(device),warmup=warmup,iters=num_frames)
+    return batch_size*1000/latencies.mean()
+
+def measure_batched(model,tensor,max_batch_size=4,max_latency=0.02,num_frames=100,device="cuda",interval=0.0):
+    """Feed single frames through BatchInferenceEngine, one every ``interval`` seconds, like a camera would."""
     with torch.no_grad():
         model=model.to(device)
         model.eval()
-        tensor=tensor.to(device)
-        for _ in range(5): model(tensor)
-        start_time=time.time()
+        frame=tensor[0].to(device)
+        for _ in range(5): model(tensor.to(device))
+    latencies=[]
+    def on_done(start_time):
+        return lambda _: latencies.append(time.perf_counter()-start_time)
+    with BatchInferenceEngine(model,max_batch_size=max_batch_size,max_latency=max_latency) as engine:
+        futures=[]
+        start_time=time.perf_counter()
         for _ in tqdm(range(num_frames)):
-            model(tensor)
-        end_time=time.time()
-    fps=num_frames/(end_time-start_time)*batch_size
-    return fps
-
-def get_model(model_name: str, size: str, **kwargs):
-    model_map = {
-        "resnet": {
-            "18": ResNet18(**kwargs),
-            "34": ResNet34(**kwargs),
-            "50": ResNet50(**kwargs),
-        },
-        "efficientvit": {
-            "b1": efficientvit_cls_b1(**kwargs),
-            "b2": efficientvit_cls_b2(**kwargs),
-            "b3": efficientvit_cls_b3(**kwargs),
-        },
-        "efficientnet": {
-            "b1":EfficientNetB1(**kwargs),
-            "b3": EfficientNetB3(**kwargs),
-        },
-        "mobilevit": {
-            "s": MobileVit_s(**kwargs),
-            "xs": MobileViT_xs(**kwargs),
-            "xxs": MobileViT_xxs(**kwargs),
-        },
-        "inception": {
-            "v4": Inception_v4(**kwargs),
-        },
-        "resevit_road":{
-            "standard": ResEViT_road_cls(**kwargs),
-        }
+            future=engine.submit(frame)
+            future.add_done_callback(on_done(time.perf_counter()))
+            futures.append(future)
+            if interval>0: time.sleep(interval)
+        for future in futures: future.result()
+        end_time=time.perf_counter()
+        avg_batch_size=engine.avg_batch_size
+    latencies=np.array(latencies)*1000
+    return {
+        "fps": num_frames/(end_time-start_time),
+        "avg_batch_size": avg_batch_size,
+        "p50_ms": float(np.percentile(latencies,50)),
+        "p90_ms": float(np.percentile(latencies,90)),
+        "p99_ms": float(np.percentile(latencies,99)),
     }
-    return model_map[model_name][size]
+
+def measure_latency(model,tensor,num_frames=100,device="cuda"):
+    """Per-frame latency in ms, waiting for the device to finish every frame."""
+    model=model.to(device)
+    model.eval()
+    latencies=time_model(model,tensor.to(device),warmup=5,iters=num_frames)
+    return float(np.mean(latencies)), float(np.percentile(latencies,50)), float(np.percentile(latencies,90))
+
+def compare_branch_modes(model,tensor,num_frames=100,device="cuda"):
+    """Latency of ResEViT with its two branches run one after the other vs concurrently."""
+    for mode in ("sequential","parallel"):
+        model.set_branch_mode(mode)
+        mean_ms,p50_ms,p90_ms=measure_latency(model,tensor,num_frames=num_frames,device=device)
+        print(f"[{mode}] latency mean/p50/p90: {mean_ms:.2f}/{p50_ms:.2f}/{p90_ms:.2f} ms")
+
+def attention_sweep(resolutions,num_classes=2,num_frames=20,device="cuda"):
+    """Latency and peak memory of ResEViT with softmax vs linear CrossAttention over input resolutions."""
+    models={attention:ResEViT_road_cls(num_classes=num_classes,attention=attention) for attention in ("softmax","linear")}
+    models["linear"].load_state_dict(models["softmax"].state_dict())
+    print(f"{'resolution':>10} {'attention':>9} {'mean ms':>9} {'p90 ms':>9} {'peak MB':>9}")
+    for resolution in resolutions:
+        tensor=torch.randn((1,3,resolution,resolution))
+        for attention,model in models.items():
+            if device.startswith("cuda"):
+                torch.cuda.empty_cache()
+                torch.cuda.reset_peak_memory_stats(device)
+            try:
+                mean_ms,_,p90_ms=measure_latency(model,tensor,num_frames=num_frames,device=device)
+            except torch.cuda.OutOfMemoryError:
+                print(f"{resolution:>10} {attention:>9} {'OOM':>9}")
+                continue
+            peak_mb=f"{torch.cuda.max_memory_allocated(device)/1024**2:.0f}" if device.startswith("cuda") else "-"
+            print(f"{resolution:>10} {attention:>9} {mean_ms:>9.2f} {p90_ms:>9.2f} {peak_mb:>9}")
 
 def main(arg):
     model_name=arg.model_name
     model_size=arg.model_size
     num_classes=arg.num_classes
     device=arg.device
+    if arg.list_models:
+        print("\n".join(available_models()))
+        return
     print(f"Model: {model_name} {model_size}")
     print("begin")
+    if arg.attention_sweep:
+        attention_sweep(arg.resolutions,num_classes=num_classes,device=device)
+        print("end")
+        return
     tensor=init_tensor()
     model=get_model(model_name,model_size,num_classes=num_classes)
-    fps=measure_fps(model,tensor,device=device)
-    print(f"FPS: {fps}")
+    if arg.fuse:
+        model=fuse_for_inference(model.eval(),verbose=True)
+    if arg.compare_branch_modes:
+        compare_branch_modes(model,tensor,device=device)
+    elif arg.batch_size>1:
+        result=measure_batched(model,tensor,max_batch_size=arg.batch_size,max_latency=arg.max_latency_ms/1000,
+                               device=device,interval=arg.interval_ms/1000)
+        print(f"FPS: {result['fps']:.2f}, avg batch size: {result['avg_batch_size']:.2f}, "
+              f"latency p50/p90/p99: {result['p50_ms']:.1f}/{result['p90_ms']:.1f}/{result['p99_ms']:.1f} ms")
+    else:
+        fps=measure_fps(model,tensor,device=device)
+        print(f"FPS: {fps}")
     print("end")
 
 
@@ -75,8 +119,16 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Measuring FPS')
     parser.add_argument('--image_size', type=int, default=224, help='Image size for training')
     parser.add_argument('--num_classes', type=int, default=2, help='The number of class of dataset')
-    parser.add_argument('--model_name', type=str, default="resevit", help='Model name to use')
-    parser.add_argument('--model_size', type=str, default="small", help='Model size to use')
+    parser.add_argument('--model_name', type=str, default="resevit_road", help='Model name to use, see models.MODEL_REGISTRY')
+    parser.add_argument('--model_size', type=str, default="standard", help='Model size to use')
     parser.add_argument('--device', type=str, default="cuda", help='Device to use')
+    parser.add_argument('--list_models', action='store_true', help='Print the registered model names and sizes')
+    parser.add_argument('--batch_size', type=int, default=1, help='Maximum micro-batch size, >1 measures through BatchInferenceEngine')
+    parser.add_argument('--max_latency_ms', type=float, default=20.0, help='Batching deadline of the micro-batch engine')
+    parser.add_argument('--interval_ms', type=float, default=0.0, help='Time between two submitted frames, 0 submits as fast as possible')
+    parser.add_argument('--fuse', action='store_true', help='Fold BatchNorm into the preceding convs before measuring')
+    parser.add_argument('--compare_branch_modes', action='store_true', help='ResEViT only: latency of sequential vs parallel branches')
+    parser.add_argument('--attention_sweep', action='store_true', help='ResEViT only: softmax vs linear CrossAttention over --resolutions')
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[224, 384, 512, 768, 1024], help='Input resolutions of the attention sweep')
     args = parser.parse_args()
     main(args)
@@ -0,0 +1,53 @@
+import importlib
+
+__all__ = ["MODEL_REGISTRY", "available_models", "get_model_class", "get_model"]
+
+# model name -> size -> "module:attribute" of the factory. Nothing is imported
+# until a model is asked for, so picking one never loads timm or the other architectures.
+MODEL_REGISTRY = {
+    "resnet": {
+        "18": "baseline.resnet:ResNet18",
+        "34": "baseline.resnet:ResNet34",
+        "50": "baseline.resnet:ResNet50",
+    },
+    "efficientvit": {
+        "b1": "baseline.efficientvit.models.efficientvit.cls:efficientvit_cls_b1",
+        "b2": "baseline.efficientvit.models.efficientvit.cls:efficientvit_cls_b2",
+        "b3": "baseline.efficientvit.models.efficientvit.cls:efficientvit_cls_b3",
+    },
+    "efficientnet": {
+        "b0": "baseline.efficientnet:EfficientNetB0",
+        "b1": "baseline.efficientnet:EfficientNetB1",
+        "b2": "baseline.efficientnet:EfficientNetB2",
+        "b3": "baseline.efficientnet:EfficientNetB3",
+    },
+    "mobilevit": {
+        "s": "baseline.mobilevit:MobileVit_s",
+        "xs": "baseline.mobilevit:MobileViT_xs",
+        "xxs": "baseline.mobilevit:MobileViT_xxs",
+    },
+    "inception": {
+        "v4": "baseline.inception:Inception_v4",
+    },
+    "resevit_road": {
+        "standard": "ResEViT_Road:ResEViT_road_cls",
+    },
+}
+
+
+def available_models() -> list:
+    return [f"{name} {size}" for name, sizes in MODEL_REGISTRY.items() for size in sizes]
+
+
+def get_model_class(model_name: str, size: str):
+    """Import and return the factory of ``model_name`` / ``size`` without building it."""
+    try:
+        target = MODEL_REGISTRY[model_name][size]
+    except KeyError:
+        raise KeyError(f"Unknown model {model_name} {size}, available: {', '.join(available_models())}") from None
+    module_name, attribute = target.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def get_model(model_name: str, size: str, **kwargs):
+    return get_model_class(model_name, size)(**kwargs)
@@ -0,0 +1,151 @@
+import queue
+import threading
+import time
+
+__all__ = ["Pipeline"]
+
+
+class _Stage:
+    def __init__(self, name, fn, is_source=False):
+        self.name = name
+        self.fn = fn
+        self.is_source = is_source
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self._last_processed = 0
+
+
+class Pipeline:
+    """Run a chain of stages, one worker thread per stage, joined by bounded queues.
+
+    The first stage is a source ``fn() -> item``; every following stage is
+    ``fn(item) -> item``. A stage returning ``None`` drops the item. Bounded
+    queues give back-pressure, so a slow stage throttles the ones before it
+    instead of letting frames pile up in memory.
+    """
+
+    def __init__(self, queue_size: int = 2, poll_interval: float = 0.1):
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.stages = []
+        self.queues = []
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._start_time = None
+        self._last_stats_time = None
+
+    def add_source(self, name: str, fn) -> "Pipeline":
+        assert len(self.stages) == 0, "The source must be the first stage"
+        self.stages.append(_Stage(name, fn, is_source=True))
+        return self
+
+    def add_stage(self, name: str, fn) -> "Pipeline":
+        assert len(self.stages) > 0, "Add a source before adding stages"
+        self.queues.append(queue.Queue(maxsize=self.queue_size))
+        self.stages.append(_Stage(name, fn))
+        return self
+
+    def _put(self, out_queue: queue.Queue, item) -> None:
+        while not self._stop_event.is_set():
+            try:
+                out_queue.put(item, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, in_queue: queue.Queue):
+        while not self._stop_event.is_set():
+            try:
+                return in_queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+        return None
+
+    def _run(self, index: int) -> None:
+        stage = self.stages[index]
+        in_queue = None if stage.is_source else self.queues[index - 1]
+        out_queue = self.queues[index] if index < len(self.queues) else None
+        while not self._stop_event.is_set():
+            if stage.is_source:
+                item = None
+            else:
+                item = self._get(in_queue)
+                if item is None:
+                    break
+            start = time.perf_counter()
+            try:
+                result = stage.fn() if stage.is_source else stage.fn(item)
+            except Exception as e:
+                stage.errors += 1
+                print(f"Pipeline Error [{stage.name}]:", e)
+                continue
+            finally:
+                stage.busy_time += time.perf_counter() - start
+            if result is None:
+                continue
+            stage.processed += 1
+            if out_queue is not None:
+                self._put(out_queue, result)
+
+    def start(self) -> None:
+        assert len(self.stages) > 0, "Pipeline has no stages"
+        self._stop_event.clear()
+        self._start_time = self._last_stats_time = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,), name=f"pipeline-{stage.name}", daemon=True)
+            for i, stage in enumerate(self.stages)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def stats(self) -> dict:
+        """Per-stage throughput and utilisation, plus queue occupancy.
+
+        ``fps`` is measured over the window since the previous call, ``avg_fps``
+        since ``start()``. ``utilization`` is the share of wall time the stage
+        worker spent inside its function; the stage closest to 1.0 is the bottleneck.
+        """
+        now = time.perf_counter()
+        elapsed = max(now - self._start_time, 1e-9)
+        window = max(now - self._last_stats_time, 1e-9)
+        self._last_stats_time = now
+
+        stages = {}
+        for stage in self.stages:
+            processed = stage.processed
+            stages[stage.name] = {
+                "processed": processed,
+                "errors": stage.errors,
+                "fps": (processed - stage._last_processed) / window,
+                "avg_fps": processed / elapsed,
+                "utilization": stage.busy_time / elapsed,
+            }
+            stage._last_processed = processed
+        queues = {
+            f"{self.stages[i].name}->{self.stages[i + 1].name}": {
+                "size": q.qsize(),
+                "capacity": q.maxsize,
+                "fill": q.qsize() / q.maxsize,
+            }
+            for i, q in enumerate(self.queues)
+        }
+        return {"stages": stages, "queues": queues}
+
+    def report(self) -> str:
+        stats = self.stats()
+        stage_str = " | ".join(
+            f"{name}: {s['fps']:.1f} fps ({s['utilization'] * 100:.0f}% busy)" for name, s in stats["stages"].items()
+        )
+        queue_str = " | ".join(f"{name}: {q['size']}/{q['capacity']}" for name, q in stats["queues"].items())
+        return f"[stages] {stage_str}\n[queues] {queue_str}"
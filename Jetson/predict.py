@@ -1,106 +1,44 @@
 import torch
-from torchvision import transforms
-import time
 import cv2
+import time
 from tqdm import tqdm
-from ResEViT_Road import ResEViT_road_cls
+from ResEViT_Road import fuse_for_inference, check_fusion
+from ResEViT_Road.precision import PRECISIONS, to_precision
+from ResEViT_Road.calibration import load_calibration, top_k
 import piexif
 from PIL import Image
 from io import BytesIO
-import requests
-import serial
-import re
-from multiprocessing import Process, Queue
-from collections import OrderedDict
+from functools import partial
+import argparse
 import os
 import shutil
+from pipeline import Pipeline
+from camera import CameraCapture
+from gps import GPSReader
+from batching import BatchInferenceEngine
+from preprocess import Preprocessor, check_preprocessor
+from uploader import Uploader, API_URL, BULK_API_URL
+from spool import FrameSpool
+from gate import GATE_METHODS, FrameGate
+from events import EventAggregator
+from evaluation import list_frames, iter_batches
+from backends import BACKENDS, create_backend, check_backend
+from models import get_model_class
+from checkpoint import artifact_path, build_from_checkpoint, load_artifact, save_artifact
 
 # Device setup
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-# Get GPS location from SIM module
-
-def turn_on_gps(serial_port='/dev/ttyUSB2', baudrate=115200):
-    try:
-        ser = serial.Serial(serial_port, baudrate, timeout=2)
-        time.sleep(1)
-        ser.write(b'AT+CGPS=1,1\r')
-        time.sleep(2)
-        ser.write(b'AT+CGPS=1\r')
-    except Exception as e:
-        print("GPS Error:", e)
-
-
-
-def convert_to_decimal(coord_str, hemisphere_str, is_latitude=True):
-    try:
-        if is_latitude:
-            degrees = int(coord_str[:2])
-            minutes = float(coord_str[2:])
-        else:
-            degrees = int(coord_str[:3])
-            minutes = float(coord_str[3:])
-
-        decimal_coord = degrees + (minutes / 60)
-
-        if is_latitude and (hemisphere_str == 'S' or hemisphere_str == 's'):
-            decimal_coord *= -1
-        elif not is_latitude and (hemisphere_str == 'W' or hemisphere_str == 'w'):
-            decimal_coord *= -1
-
-        return decimal_coord
-    except (ValueError, IndexError): # Catch specific exceptions
-        return None
-
-def get_gps_location(serial_port='/dev/ttyUSB2', baudrate=115200):
-    try:
-        ser = serial.Serial(serial_port, baudrate, timeout=2)
-        for _ in range(10):
-            ser.write(b'AT+CGPSINFO\r')
-            time.sleep(0.5) # Increased sleep slightly for response
-            response = ser.read(ser.inWaiting()).decode(errors='ignore') # Or ser.readline()
-
-            if '+CGPSINFO:' in response:
-                # Updated regex to capture hemisphere
-                match = re.search(r'\+CGPSINFO: ([^,]*),([NSns]),([^,]*),([EWew]),', response)
-                if match:
-                    lat_raw = match.group(1)
-                    lat_hemisphere = match.group(2)
-                    lon_raw = match.group(3)
-                    lon_hemisphere = match.group(4)
-
-                    if lat_raw and lon_raw and lat_hemisphere and lon_hemisphere:
-                        lat = convert_to_decimal(lat_raw, lat_hemisphere, is_latitude=True)
-                        lon = convert_to_decimal(lon_raw, lon_hemisphere, is_latitude=False)
-                        if lat is not None and lon is not None:
-                            return lat, lon
-            time.sleep(1)
-    except Exception as e:
-        print("GPS Error:", e)
-        return None, None
-
-
-
-def transform_img(img):
-    resize = 224
-    mean = (0.485, 0.456, 0.406)
-    std = (0.229, 0.224, 0.225)
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype("float32")
-    img = torch.from_numpy(img).permute(2, 0, 1)
-    img = transforms.Compose([
-        transforms.Resize((resize, resize)),
-        transforms.Normalize(mean=mean, std=std)
-    ])(img)
-    return img.to(device)
-
-def predict(model, img):
+def predict(model, img, temperature=1.0):
+    """Calibrated class probabilities of one frame."""
     with torch.no_grad():
         output = model(img.unsqueeze(0))
-        pred = torch.argmax(output, dim=1)
-    return pred.item()
+    return torch.softmax(output[0].float() / temperature, dim=0)
 
-def add_metadata(np_img, label_text,location):
-    label = f"Prediction: {label_text}, Location: {location}"
+def add_metadata(np_img, label_text,location,timestamp=None,confidence=None):
+    # the backend reads "Prediction: <int>" and "Location: (lat, lon)" from the comment
+    confidence_text = f"Confidence: {confidence:.3f}, " if confidence is not None else ""
+    label = f"Prediction: {label_text}, {confidence_text}Location: {location}"
     img_pil = Image.fromarray(np_img)
 
     exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "1st": {}, "thumbnail": None}
@@ -110,87 +48,290 @@ def add_metadata(np_img, label_text,location):
     output_buffer = BytesIO()
     img_pil.save(output_buffer, format="JPEG", exif=exif_bytes)
     output_buffer.seek(0)
-    name_file=f"{time.time()}.jpg"
+    name_file=f"{timestamp or time.time()}.jpg"
     files = {'file': (name_file, output_buffer, 'image/jpeg')}
     return files
 
-def capture(cap):
-    while True:
-        ret, frame = cap.read()
-        if ret:
-            return frame
-
-def send_image():
-    image_extensions = {'.jpg', '.jpeg', '.png'}
-    api_url="https://projects.iec-uit.com/ResEViTRoad/api/upload-image/"
-    while True:
-        file_list = [
-            filename for filename in os.listdir("cache")
-            if os.path.isfile(os.path.join("cache", filename))
-        ]
-        sorted_files = sorted(
-            file_list,
-            key=lambda x: float(os.path.splitext(x)[0])
-        )
-        for filename in sorted_files:
-            file_path = os.path.join("cache", filename)
-            if os.path.isfile(file_path) and os.path.splitext(filename)[1].lower() in image_extensions:
-                with open(file_path, 'rb') as f:
-                    files = {'file': (filename, f, 'image/jpeg')}
-                    try:
-                        response = requests.post(api_url, files=files)
-                        if response.status_code == 200:
-                           os.remove(file_path)
-                        else:
-                            print(f"Failed to upload {filename}: {response.status_code}")
-                    except Exception as e:
-                        print(f"⚠Error uploading {filename}: {e}")
-def save_to_cache(files):
-    filename, file_buffer, _ = files['file']
-    file_buffer.seek(0)
-
-    filepath = os.path.join("cache",filename)
-    with open(filepath, 'wb') as f:
-        f.write(file_buffer.read())
+BAD_ROAD_CLASSES = [0, 2, 4, 5]
+# "Good road" and "Paved good", the bulk of the frames, may leave at an early-exit head
+EASY_ROAD_CLASSES = [1, 3]
 
+# Pipeline stages, each one takes and returns the per-frame feed dict
 
+def capture_stage(camera):
+    frame, timestamp = camera.read()
+    if frame is None:
+        return None
+    return {"frame": frame, "timestamp": timestamp}
 
-if __name__ == '__main__':
+def gate_stage(gate, gps, feed_dict):
+    feed_dict["infer"] = gate(feed_dict["frame"], gps.location(), feed_dict["timestamp"])
+    return feed_dict
+
+def preprocess_stage(preprocessor, feed_dict):
+    if feed_dict.get("infer", True):
+        feed_dict["tensor"] = preprocessor(feed_dict["frame"])
+    return feed_dict
+
+def infer_stage(engine, feed_dict):
+    # does not wait for the result, so the engine can gather several frames into one batch
+    if "tensor" in feed_dict:
+        feed_dict["output"] = engine.submit(feed_dict.pop("tensor"))
+    return feed_dict
+
+def save_frame(spool, frame, label, location, timestamp, confidence=None, topk=None):
+    files = add_metadata(frame, label, location, timestamp, confidence=confidence)
+    _, file_buffer, _ = files['file']
+    spool.put(file_buffer.getvalue(), timestamp, label=label, location=location, confidence=confidence, topk=topk)
+
+def save_event(spool, event, class_thresholds=None):
+    label = event.label(BAD_ROAD_CLASSES)
+    probs = torch.from_numpy(event.class_scores / event.num_frames)
+    # the label's own probability, as for single frames and the fitted thresholds
+    confidence = float(probs[label])
+    if confidence < (class_thresholds or {}).get(label, 0.0):
+        return
+    save_frame(spool, event.best_frame, label, event.best_location, event.best_timestamp,
+               confidence=round(confidence, 4), topk=top_k(probs))
+
+def encode_stage(gps, spool, feed_dict, interpolate=False, gate=None, aggregator=None, temperature=1.0,
+                 class_thresholds=None):
+    probs = None
+    if "output" in feed_dict:
+        output = feed_dict.pop("output").result()
+        probs = torch.softmax(output.float() / temperature, dim=0)
+        pred = int(probs.argmax())
+        if gate is not None:
+            gate.last_prediction = pred
+    else:
+        # skipped by the gate: same scene as the last inferred frame
+        pred = gate.last_prediction
+    feed_dict["pred"] = pred
+    if aggregator is None and (probs is None or pred not in BAD_ROAD_CLASSES
+                               or probs[pred] < (class_thresholds or {}).get(pred, 0.0)):
+        # without events, a skipped frame was already saved with the last inferred one
+        return feed_dict
+
+    if interpolate:
+        location = gps.location_at(feed_dict["timestamp"])
+    else:
+        location = gps.location()
+    if aggregator is None:
+        save_frame(spool, feed_dict["frame"], pred, location, feed_dict["timestamp"],
+                   confidence=round(float(probs[pred]), 4), topk=top_k(probs))
+    else:
+        # one upload per defect segment instead of one per frame
+        frame_probs = None if probs is None else probs.numpy()
+        for event in aggregator.update(frame_probs, feed_dict["frame"], feed_dict["timestamp"], location):
+            save_event(spool, event, class_thresholds)
+    return feed_dict
+
+def build_pipeline(engine, preprocessor, camera, gps, spool, queue_size=2, interpolate_gps=False, gate=None,
+                   aggregator=None, temperature=1.0, class_thresholds=None):
+    pipeline = Pipeline(queue_size=queue_size)
+    pipeline.add_source("capture", partial(capture_stage, camera))
+    if gate is not None:
+        pipeline.add_stage("gate", partial(gate_stage, gate, gps))
+    pipeline.add_stage("preprocess", partial(preprocess_stage, preprocessor))
+    pipeline.add_stage("infer", partial(infer_stage, engine))
+    pipeline.add_stage("encode", partial(encode_stage, gps, spool, interpolate=interpolate_gps, gate=gate,
+                                         aggregator=aggregator, temperature=temperature,
+                                         class_thresholds=class_thresholds))
+    return pipeline
+
+
+def load_model(checkpoint, num_classes=7, model_name="resevit_road", model_size="standard", **kwargs):
+    factory = partial(get_model_class(model_name, model_size), num_classes=num_classes, **kwargs)
+    return build_from_checkpoint(factory, checkpoint, device=device)
+
+
+def prepare_model(args, model_kwargs):
+    """Checkpoint -> fused -> reduced precision model, as in the deployment artifact."""
+    model = load_model(args.checkpoint, model_name=args.model_name, model_size=args.model_size, **model_kwargs)
+    if not args.no_fuse:
+        fused = fuse_for_inference(model, verbose=True)
+        diff = check_fusion(model, fused, input_size=(1, 3, args.image_size, args.image_size))
+        print(f"Fused model max abs diff: {diff:.2e}")
+        model = fused
+    if args.precision != "fp32":
+        calibration_batches = None
+        if args.precision == "int8":
+            # calibrate on inputs resized the way they are at run time
+            calib_preprocessor = Preprocessor(args.image_size,
+                                              interpolation=cv2.INTER_AREA if args.fast_resize else None)
+            calibration_batches = iter_batches(list_frames(args.calib_dir, args.num_calib), calib_preprocessor)
+        model = to_precision(model, args.precision, calibration_batches, backend=args.quant_backend)
+    return model
+
+
+def main(args):
+    global device
     print("Begin")
-    model = ResEViT_road_cls(num_classes=7)
-    model.to(device)
-    check_point=torch.load("resevit_road_standard_Road_CLS_Quality-06-23--15-40-state_dict.pt")
-
-    cleaned_state_dict = OrderedDict()
-    for k, v in check_point.items():
-        if k.startswith('model.'):
-            new_key = k[len('model.'):]
-            cleaned_state_dict[new_key] = v
+    # branch mode, attention kind and early exit only exist on ResEViT
+    model_kwargs = {}
+    if args.model_name == "resevit_road":
+        model_kwargs = dict(branch_mode="parallel" if args.parallel_branches else "sequential", attention=args.attention,
+                            exit_stages=tuple(args.exit_stages), exit_threshold=args.exit_threshold,
+                            exit_classes=tuple(args.exit_classes))
+    if args.precision.startswith("int8"):
+        # quantized kernels only run on CPU
+        device = torch.device("cpu")
+    start_time = time.time()
+    if args.no_artifact:
+        model = prepare_model(args, model_kwargs)
+    else:
+        # a trace is specialized to the input size, static int8 to its calibration frames
+        calibration = (os.path.abspath(args.calib_dir), args.num_calib, args.fast_resize) \
+            if args.precision == "int8" else None
+        path = artifact_path(args.checkpoint, args.model_cache, args.model_name, args.model_size, model_kwargs,
+                             not args.no_fuse, args.precision, args.quant_backend, str(device), args.image_size,
+                             calibration, traced=args.precision == "int8",
+                             model_class=get_model_class(args.model_name, args.model_size))
+        if os.path.exists(path):
+            model = load_artifact(path, device)
         else:
-            cleaned_state_dict[k] = v
-    model.load_state_dict(cleaned_state_dict)
-    model.eval()
+            model = prepare_model(args, model_kwargs)
+            save_artifact(model, path, torch.randn(1, 3, args.image_size, args.image_size, device=device))
+        print(f"Deployment artifact: {path}")
+    print(f"Model ready in {time.time() - start_time:.1f}s, precision: {args.precision}")
+    if args.backend != "torch":
+        # ONNX Runtime takes CPU inputs, TorchScript runs on the same device as eager torch
+        start_time = time.time()
+        backend = create_backend(args.backend, model, args.model_path, device=device, image_size=args.image_size,
+                                 max_batch_size=args.batch_size, cache_dir=args.model_cache)
+        diff = check_backend(model, backend, input_shapes=[(1, 3, args.image_size, args.image_size)])
+        print(f"Backend: {args.backend}, ready in {time.time() - start_time:.1f}s, max abs diff: {diff:.2e}")
+        model = backend
+        if args.backend == "onnxruntime":
+            device = torch.device("cpu")
 
+    gps = GPSReader(args.gps_port, poll_interval=args.gps_interval).start()
 
-    cap = cv2.VideoCapture(0)
-    turn_on_gps()
+    # frames only batch up if enough of them can wait between infer and encode
+    queue_size = max(args.queue_size, args.batch_size)
+    # camera frames stay in their ring slot until encode is done with them: one per queue slot and stage, plus
+    # the latest frame and the one being decoded
+    camera = CameraCapture.open(args.camera, args.capture_width, args.capture_height, args.capture_fps,
+                                num_buffers=4 * queue_size + 5 + 2, loop=args.loop).start()
+    # every tensor between preprocess and the end of its batch needs its own buffer
+    preprocessor = Preprocessor(args.image_size, device=device, num_buffers=2 * queue_size + args.batch_size + 3,
+                                interpolation=cv2.INTER_AREA if args.fast_resize else None)
 
     #Warm up
     for _ in tqdm(range(5)):
-        frame = capture(cap)
-        img_tensor = transform_img(frame)
+        frame, _ = camera.read(timeout=None)
+        img_tensor = preprocessor(frame)
         _ = predict(model, img_tensor)
+    resize = "uint8 cv2.INTER_AREA resize" if args.fast_resize else "float antialiased resize"
+    print(f"Preprocessor ({resize}) max abs diff vs transform_img: {check_preprocessor(preprocessor, frame):.2e}")
 
     # Inference loop
-    p1 = Process(target=send_image)
-    p1.start()
+    spool = FrameSpool(args.cache_dir, max_bytes=int(args.cache_size_mb * 1024 ** 2))
+    uploader = Uploader(spool, args.api_url, num_workers=args.upload_workers, batch_size=args.upload_batch_size,
+                        bulk_api_url=args.bulk_api_url).start()
+    engine = BatchInferenceEngine(model, max_batch_size=args.batch_size, max_latency=args.max_latency_ms / 1000).start()
+    gate = None
+    if args.gate != "none":
+        gate = FrameGate(args.gate, threshold=args.gate_threshold, min_distance_m=args.gate_min_distance,
+                         max_interval=args.gate_max_interval)
+    aggregator = None
+    if not args.no_events:
+        aggregator = EventAggregator(BAD_ROAD_CLASSES, window=args.event_window, on_threshold=args.event_on,
+                                     off_threshold=args.event_off, merge_distance_m=args.event_merge_distance,
+                                     merge_gap=args.event_merge_gap, max_event_seconds=args.event_max_seconds,
+                                     max_event_distance_m=args.event_max_distance)
+    temperature, class_thresholds = 1.0, {}
+    if args.calibration:
+        temperature, class_thresholds = load_calibration(args.calibration)
+        print(f"Calibration: temperature {temperature:.3f}, upload thresholds {class_thresholds}")
+    pipeline = build_pipeline(engine, preprocessor, camera, gps, spool, queue_size=queue_size,
+                              interpolate_gps=args.interpolate_gps, gate=gate, aggregator=aggregator,
+                              temperature=temperature, class_thresholds=class_thresholds)
+    pipeline.start()
     print("Running")
-    while True:
-        location = get_gps_location()
-        frame = capture(cap)
-        img_tensor = transform_img(frame)
-        pred = predict(model, img_tensor)
-        if pred in [0,2,4,5]:
-            files=add_metadata(frame,pred,location)
-            save_to_cache(files)
-        time.sleep(0.2)
+    try:
+        while pipeline.running and not camera.finished:
+            time.sleep(args.report_interval)
+            print(pipeline.report())
+            stats = camera.stats()
+            print(f"[camera] frame age: {stats['avg_age'] * 1000:.0f} ms (last {stats['last_age'] * 1000:.0f} ms), "
+                  f"dropped: {stats['dropped']}/{stats['captured']}, read failures: {stats['failures']}")
+            print(f"[infer] avg batch size: {engine.avg_batch_size:.2f}")
+            if gate is not None:
+                stats = gate.stats()
+                print(f"[gate] skip rate: {stats['skip_rate'] * 100:.0f}% (static {stats['skipped_static']}, "
+                      f"stationary {stats['skipped_stationary']}), duty cycle: {stats['duty_cycle'] * 100:.0f}%")
+            print(f"[gps] {gps.latest()}")
+            if aggregator is not None:
+                print(f"[events] {aggregator.stats()}")
+            print(f"[upload] uploaded: {uploader.uploaded}, failed attempts: {uploader.failed}, spool: {spool.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        camera.stop()
+        engine.stop()
+        if aggregator is not None:
+            for event in aggregator.flush():
+                save_event(spool, event, class_thresholds)
+        gps.stop()
+        uploader.stop()
+        spool.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Road quality inference on the edge device')
+    parser.add_argument('--checkpoint', type=str, default="resevit_road_standard_Road_CLS_Quality-06-23--15-40-state_dict.pt", help='Path to the model state dict')
+    parser.add_argument('--model_name', type=str, default="resevit_road", help='Architecture of the checkpoint, see models.MODEL_REGISTRY')
+    parser.add_argument('--model_size', type=str, default="standard", help='Size of the architecture')
+    parser.add_argument('--image_size', type=int, default=224, help='Model input resolution')
+    parser.add_argument('--fast_resize', action='store_true', help='Resize the uint8 frame with cv2.INTER_AREA before the float conversion, cheaper but approximate')
+    parser.add_argument('--no_fuse', action='store_true', help='Keep BatchNorm layers separate instead of folding them into the convs')
+    parser.add_argument('--parallel_branches', action='store_true', help='Run the ResNet and EfficientViT branches concurrently')
+    parser.add_argument('--attention', type=str, default="softmax", choices=["softmax", "linear"], help='CrossAttention kind the checkpoint was trained with')
+    parser.add_argument('--exit_stages', type=int, nargs='*', default=[], help='0-based stages with an early-exit head in the checkpoint, e.g. 1 2')
+    parser.add_argument('--exit_threshold', type=float, default=None, help='Confidence needed to leave at an exit head, see early_exit_report.py')
+    parser.add_argument('--exit_classes', type=int, nargs='+', default=EASY_ROAD_CLASSES, help='Classes allowed to exit early')
+    parser.add_argument('--precision', type=str, default="fp32", choices=PRECISIONS, help='Inference precision, int8 modes run on CPU')
+    parser.add_argument('--calib_dir', type=str, default="calibration", help='Folder of sample frames for int8 calibration')
+    parser.add_argument('--num_calib', type=int, default=256, help='Number of calibration frames')
+    parser.add_argument('--quant_backend', type=str, default="qnnpack", choices=["fbgemm", "qnnpack"], help='Quantized engine, qnnpack on ARM')
+    parser.add_argument('--no_artifact', action='store_true', help='Always rebuild the model from --checkpoint instead of the cached deployment artifact')
+    parser.add_argument('--backend', type=str, default="torch", choices=BACKENDS, help='Inference backend, graph backends are built on first use and cached')
+    parser.add_argument('--model_path', type=str, default=None, help='TorchScript/ONNX file of the backend, defaults to a file in --model_cache')
+    parser.add_argument('--model_cache', type=str, default="model_cache", help='Directory of the deployment artifacts, cached TorchScript/ONNX graphs and compiled kernels')
+    parser.add_argument('--camera', type=str, default="0", help='Frame source: camera index, csi:<sensor_id>, v4l2:<device>, gst:<pipeline>, synthetic or a video file')
+    parser.add_argument('--capture_width', type=int, default=None, help='Frame width delivered by the source, GStreamer sources downscale in the pipeline')
+    parser.add_argument('--capture_height', type=int, default=None, help='Frame height delivered by the source')
+    parser.add_argument('--capture_fps', type=int, default=30, help='Camera frame rate')
+    parser.add_argument('--loop', action='store_true', help='Restart a video file source at its end')
+    parser.add_argument('--queue_size', type=int, default=2, help='Capacity of the queue between two pipeline stages')
+    parser.add_argument('--report_interval', type=float, default=10.0, help='Seconds between two pipeline throughput reports')
+    parser.add_argument('--batch_size', type=int, default=1, help='Maximum number of frames per inference batch')
+    parser.add_argument('--max_latency_ms', type=float, default=20.0, help='Maximum time the first frame of a batch waits for the batch to fill')
+    parser.add_argument('--gate', type=str, default="none", choices=("none",) + GATE_METHODS, help='Skip inference on frames similar to the last inferred one, e.g. diff')
+    parser.add_argument('--gate_threshold', type=float, default=None, help='Scene change needed to infer again, mean abs diff in [0, 1] or dHash bits')
+    parser.add_argument('--gate_min_distance', type=float, default=0.0, help='Meters travelled needed to infer again, 0 disables GPS gating')
+    parser.add_argument('--gate_max_interval', type=float, default=2.0, help='Seconds after which a frame is inferred even if nothing changed')
+    parser.add_argument('--calibration', type=str, default=None, help='Temperature and per-class upload thresholds written by calibrate.py')
+    parser.add_argument('--no_events', action='store_true', help='Save every bad-road frame instead of one frame per defect segment')
+    parser.add_argument('--event_window', type=int, default=5, help='Frames averaged to smooth the predictions')
+    parser.add_argument('--event_on', type=float, default=0.6, help='Smoothed bad-road probability that opens an event')
+    parser.add_argument('--event_off', type=float, default=0.4, help='Smoothed bad-road probability that closes it')
+    parser.add_argument('--event_merge_distance', type=float, default=20.0, help='Events closer than this many meters are merged')
+    parser.add_argument('--event_merge_gap', type=float, default=5.0, help='Without GPS, events closer than this many seconds are merged')
+    parser.add_argument('--event_max_seconds', type=float, default=30.0, help='Longer events are uploaded in pieces of this many seconds')
+    parser.add_argument('--event_max_distance', type=float, default=200.0, help='Longer events are uploaded in pieces of this many meters')
+    parser.add_argument('--gps_port', type=str, default='/dev/ttyUSB2', help='Serial port of the GPS modem')
+    parser.add_argument('--gps_interval', type=float, default=1.0, help='Seconds between two GPS polls')
+    parser.add_argument('--interpolate_gps', action='store_true', help='Interpolate each frame location along the GPS track')
+    parser.add_argument('--api_url', type=str, default=API_URL, help='Upload endpoint of the backend')
+    parser.add_argument('--cache_dir', type=str, default="cache", help='Directory of the on-device frame spool')
+    parser.add_argument('--cache_size_mb', type=float, default=2048, help='Disk budget of the frame spool')
+    parser.add_argument('--upload_workers', type=int, default=2, help='Number of concurrent uploads')
+    parser.add_argument('--upload_batch_size', type=int, default=32, help='Frames per upload request, >1 uses the bulk endpoint')
+    parser.add_argument('--bulk_api_url', type=str, default=BULK_API_URL, help='Bulk upload endpoint of the backend')
+    args = parser.parse_args()
+    if args.backend != "torch" and args.precision != "fp32":
+        parser.error("--precision only applies to the torch backend")
+    main(args)
@@ -0,0 +1,173 @@
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+__all__ = ["Preprocessor", "reference_transform", "check_preprocessor"]
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def reference_transform(frame: np.ndarray, image_size: Union[int, tuple] = 224, mean=IMAGENET_MEAN,
+                        std=IMAGENET_STD) -> torch.Tensor:
+    """The original ``transform_img`` of predict.py, kept as the reference ``Preprocessor`` must match.
+
+    The deployed checkpoints were run on 0-255 pixels normalized with the
+    ImageNet mean/std (no 1/255 scaling), resized by torchvision's antialiased
+    bilinear ``Resize``.
+    """
+    from torchvision import transforms
+
+    size = (image_size, image_size) if isinstance(image_size, int) else tuple(image_size)
+    img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB).astype("float32")
+    img = torch.from_numpy(img).permute(2, 0, 1)
+    return transforms.Compose([
+        transforms.Resize(size),
+        transforms.Normalize(mean=mean, std=std)
+    ])(img)
+
+
+def check_preprocessor(preprocessor: "Preprocessor", frame: np.ndarray) -> float:
+    """Max abs difference between ``preprocessor(frame)`` and ``reference_transform``."""
+    expected = reference_transform(frame, preprocessor.image_size, preprocessor.mean, preprocessor.std)
+    return (preprocessor(frame).cpu() - expected).abs().max().item()
+
+
+class Preprocessor:
+    """Turn uint8 HWC frames into normalized float CHW model inputs.
+
+    The output matches ``reference_transform``: 0-255 pixels normalized with
+    the ImageNet mean/std, resized with antialiased bilinear interpolation.
+    The channel swap and the mean/std normalization are folded into a single
+    ``3x3`` affine map applied with one ``addmm`` (``baddbmm`` for batches),
+    which also produces the CHW layout. Only uint8 pixels are staged: on CUDA
+    they are copied asynchronously from pinned memory and converted and
+    resized on the device, through a preallocated full-resolution float frame.
+
+    ``interpolation`` set to a cv2 flag (e.g. ``cv2.INTER_AREA``) resizes the
+    uint8 frame with OpenCV before the float conversion instead. That is
+    cheaper on CPU but only approximates the reference (rounding and kernel
+    differences), so check the accuracy of the checkpoint before using it
+    (``predict.py --fast_resize`` prints the deviation from the reference).
+
+    Outputs are written into a ring of ``num_buffers`` preallocated tensors and
+    a returned tensor is overwritten ``num_buffers`` calls later, so the ring
+    must be larger than the number of frames in flight downstream.
+    """
+
+    def __init__(
+        self,
+        image_size: Union[int, tuple] = 224,
+        mean=IMAGENET_MEAN,
+        std=IMAGENET_STD,
+        device: Union[str, torch.device] = "cpu",
+        bgr: bool = True,
+        pin_memory: bool = True,
+        num_buffers: int = 4,
+        interpolation=None,
+    ):
+        self.image_size = (image_size, image_size) if isinstance(image_size, int) else tuple(image_size)
+        self.mean = tuple(mean)
+        self.std = tuple(std)
+        self.device = torch.device(device)
+        self.interpolation = interpolation
+        h, w = self.image_size
+        self._use_cuda = self.device.type == "cuda"
+        self._pin_memory = pin_memory and self._use_cuda
+
+        # out[c] = x[src_c] / std[c] - mean[c] / std[c], on 0-255 pixels like reference_transform
+        src_channels = [2, 1, 0] if bgr else [0, 1, 2]
+        weight = torch.zeros(3, 3)
+        for c, src_c in enumerate(src_channels):
+            weight[c, src_c] = 1.0 / std[c]
+        bias = -torch.tensor(mean) / torch.tensor(std)
+        self._weight = weight.to(self.device)
+        self._bias = bias.view(3, 1).to(self.device)
+
+        # staging buffers hold the frame as captured, or already resized with a cv2 interpolation
+        self._staging = [None] * num_buffers
+        self._device_src = [None] * num_buffers
+        self._events = [None] * num_buffers
+        # full-resolution float frame of the default path, allocated at the first frame's size
+        self._frame_float = None
+        self._scratch = torch.empty((3, h * w), dtype=torch.float32, device=self.device)
+        self._outputs = [torch.empty((3, h, w), dtype=torch.float32, device=self.device) for _ in range(num_buffers)]
+        self._index = 0
+
+    def resize(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """uint8 resize with the cv2 ``interpolation`` (the approximate path)."""
+        h, w = self.image_size
+        if frame.shape[:2] == (h, w):
+            if dst is None:
+                return frame
+            np.copyto(dst, frame)
+            return dst
+        return cv2.resize(frame, (w, h), dst=dst, interpolation=self.interpolation)
+
+    def _to_float(self, pixels: torch.Tensor, out: torch.Tensor) -> torch.Tensor:
+        """``(H, W, 3)`` uint8 on the device to ``(3, h * w)`` float in ``out``, resized like torchvision."""
+        h, w = self.image_size
+        if tuple(pixels.shape[:2]) == (h, w):
+            out.view(3, h, w).copy_(pixels.permute(2, 0, 1))
+            return out
+        shape = (1, 3) + tuple(pixels.shape[:2])
+        if self._frame_float is None or tuple(self._frame_float.shape) != shape:
+            self._frame_float = torch.empty(shape, dtype=torch.float32, device=pixels.device)
+        self._frame_float[0].copy_(pixels.permute(2, 0, 1))
+        x = F.interpolate(self._frame_float, size=(h, w), mode="bilinear", align_corners=False, antialias=True)
+        out.view(3, h, w).copy_(x[0])
+        return out
+
+    def __call__(self, frame: np.ndarray) -> torch.Tensor:
+        i = self._index
+        self._index = (i + 1) % len(self._outputs)
+        if self._events[i] is not None:
+            # the previous async copy out of this staging buffer must be done before reusing it
+            self._events[i].synchronize()
+
+        shape = self.image_size + (3,) if self.interpolation is not None else frame.shape
+        if self._staging[i] is None or tuple(self._staging[i].shape) != tuple(shape):
+            self._staging[i] = torch.empty(shape, dtype=torch.uint8, pin_memory=self._pin_memory)
+            self._device_src[i] = torch.empty_like(self._staging[i], device=self.device) if self._use_cuda else None
+        staging = self._staging[i]
+        if self.interpolation is not None:
+            self.resize(frame, dst=staging.numpy())
+        else:
+            staging.numpy()[...] = frame
+        src = staging
+        if self._device_src[i] is not None:
+            src = self._device_src[i]
+            src.copy_(staging, non_blocking=True)
+            self._events[i] = torch.cuda.Event()
+            self._events[i].record()
+        out = self._outputs[i]
+        torch.addmm(self._bias, self._weight, self._to_float(src, self._scratch), out=out.view(3, -1))
+        return out
+
+    def batch(self, frames: list, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """Batched variant returning ``(N, 3, H, W)``; the output is freshly allocated unless ``out`` is given.
+
+        Usable as the image half of a DataLoader ``collate_fn``: with ``device="cpu"``
+        it runs in the loader workers. Frames may have different sizes.
+        """
+        h, w = self.image_size
+        n = len(frames)
+        pixels = torch.empty((n, 3, h * w), dtype=torch.float32, device=self.device)
+        for i, frame in enumerate(frames):
+            frame = np.asarray(frame)
+            if self.interpolation is not None:
+                frame = self.resize(frame)
+            src = torch.from_numpy(np.ascontiguousarray(frame)).to(self.device, non_blocking=True)
+            self._to_float(src, pixels[i])
+        if out is None:
+            out = torch.empty((n, 3, h, w), dtype=torch.float32, device=self.device)
+        torch.baddbmm(self._bias, self._weight.expand(n, 3, 3), pixels, out=out.view(n, 3, -1))
+        return out
+
+    def collate(self, samples: list) -> tuple:
+        """``collate_fn`` for datasets yielding ``(uint8 HWC image, label)`` pairs."""
+        images, labels = zip(*samples)
+        return self.batch(images), torch.as_tensor(labels)
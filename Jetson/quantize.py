@@ -0,0 +1,60 @@
+import argparse
+import copy
+import io
+import time
+
+import torch
+
+from ResEViT_Road import fuse_for_inference
+from ResEViT_Road.precision import PRECISIONS, to_precision
+from evaluation import evaluate, iter_batches, list_frames, load_labelled_folder
+from predict import load_model
+from preprocess import Preprocessor
+
+
+def model_size_mb(model) -> float:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1024 ** 2
+
+
+def main(args):
+    model = fuse_for_inference(load_model(args.checkpoint, num_classes=args.num_classes).cpu())
+    preprocessor = Preprocessor(args.image_size)
+    samples = load_labelled_folder(args.eval_dir)
+    calib_paths = list_frames(args.calib_dir, args.num_calib)
+    print(f"{len(samples)} evaluation frames, {len(calib_paths)} calibration frames")
+
+    reference = None
+    print(f"{'precision':>12} {'accuracy':>9} {'delta':>8} {'agree':>7} {'ms/frame':>9} {'size MB':>8}")
+    for precision in args.precision:
+        device = "cpu" if precision.startswith("int8") else args.device
+        start_time = time.time()
+        calibration_batches = iter_batches(calib_paths, preprocessor, args.batch_size) if precision == "int8" else None
+        converted = to_precision(copy.deepcopy(model).to(device), precision, calibration_batches, backend=args.backend)
+        prepare_time = time.time() - start_time
+        result = evaluate(converted, samples, preprocessor, args.batch_size, device=device)
+        preds = result["logits"].argmax(dim=1)
+        if reference is None:
+            reference = (result["accuracy"], preds)
+        delta = result["accuracy"] - reference[0]
+        agree = (preds == reference[1]).float().mean().item()
+        print(f"{precision:>12} {result['accuracy']:>9.4f} {delta:>+8.4f} {agree:>7.3f} "
+              f"{result['ms_per_frame']:>9.2f} {model_size_mb(converted):>8.1f}   (prepared in {prepare_time:.1f}s)")
+
+
+if __name__ == '__main__':
+    # deltas and agreement are measured against the first precision in the list
+    parser = argparse.ArgumentParser(description='Accuracy and latency of ResEViT in reduced precision')
+    parser.add_argument('--checkpoint', type=str, required=True, help='Path to the model state dict')
+    parser.add_argument('--num_classes', type=int, default=7, help='Number of classes of the checkpoint')
+    parser.add_argument('--eval_dir', type=str, required=True, help='Held-out set laid out as <class>/<image>')
+    parser.add_argument('--calib_dir', type=str, default="calibration", help='Folder of sample frames for int8 calibration')
+    parser.add_argument('--num_calib', type=int, default=256, help='Number of calibration frames')
+    parser.add_argument('--precision', type=str, nargs='+', default=list(PRECISIONS), choices=PRECISIONS, help='Precisions to compare')
+    parser.add_argument('--backend', type=str, default="fbgemm", choices=["fbgemm", "qnnpack"], help='Quantized engine, qnnpack on ARM')
+    parser.add_argument('--image_size', type=int, default=224, help='Model input resolution')
+    parser.add_argument('--batch_size', type=int, default=16, help='Evaluation batch size')
+    parser.add_argument('--device', type=str, default="cuda" if torch.cuda.is_available() else "cpu", help='Device of the float precisions')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+__all__ = ["FrameRecord", "FrameSpool"]
+
+PENDING, INFLIGHT, UPLOADED, EVICTED = 0, 1, 2, 3
+STATE_NAMES = {PENDING: "pending", INFLIGHT: "inflight", UPLOADED: "uploaded", EVICTED: "evicted"}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    timestamp REAL NOT NULL,
+    label INTEGER,
+    lat REAL,
+    lon REAL,
+    size INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    confidence REAL,
+    topk TEXT
+);
+CREATE INDEX IF NOT EXISTS frames_state_id ON frames (state, id);
+"""
+# columns added after the first release, created on spools that predate them
+MIGRATIONS = {"confidence": "REAL", "topk": "TEXT"}
+
+
+class FrameRecord:
+    __slots__ = ("id", "filename", "timestamp", "label", "lat", "lon", "size", "confidence", "topk", "path")
+
+    def __init__(self, id, filename, timestamp, label, lat, lon, size, confidence=None, topk=None, root=""):
+        self.id = id
+        self.filename = filename
+        self.timestamp = timestamp
+        self.label = label
+        self.lat = lat
+        self.lon = lon
+        self.size = size
+        self.confidence = confidence
+        self.topk = json.loads(topk) if isinstance(topk, str) else topk
+        self.path = os.path.join(root, filename)
+
+    @property
+    def location(self) -> Optional[tuple]:
+        return None if self.lat is None else (self.lat, self.lon)
+
+    @property
+    def metadata(self) -> dict:
+        """Structured record sent along with the image and kept by the backend as a JSON sidecar."""
+        metadata = {"timestamp": self.timestamp, "label": self.label, "location": self.location}
+        if self.confidence is not None:
+            metadata["confidence"] = self.confidence
+        if self.topk is not None:
+            metadata["topk"] = self.topk
+        return metadata
+
+    def __repr__(self):
+        return f"FrameRecord(id={self.id}, filename={self.filename}, label={self.label})"
+
+
+def _fsync_dir(path: str) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class FrameSpool:
+    """On-device frame store indexed by SQLite.
+
+    Every frame is written atomically (temporary file, fsync, rename) and
+    indexed with its timestamp, label, location and upload state. Pending
+    frames are dequeued oldest first through the ``(state, id)`` index, so the
+    cost does not grow with the spool size. ``claim`` hands frames to an
+    uploader, which then calls ``ack`` or ``release``; frames claimed but never
+    acknowledged before a crash are pending again on the next start. Uploaded
+    and evicted frames are deleted from the index as well as from disk, so the
+    index only holds frames still to upload; ``stats`` counts them in memory.
+
+    When the frames on disk exceed ``max_bytes``, pending frames are evicted,
+    oldest first, those labelled in ``evict_first`` (e.g. "Rain") before any other.
+    """
+
+    def __init__(self, root="cache", max_bytes=2 * 1024 ** 3, evict_first=(4,)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.evict_first = tuple(evict_first)
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._db = sqlite3.connect(os.path.join(root, "spool.db"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self._recover()
+        self._total_bytes, self._pending = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM frames"
+        ).fetchone()
+        self._inflight = 0
+        self._uploaded = 0
+        self._evicted = 0
+        # names written to disk but not indexed yet, see _reserve_filename
+        self._reserved = set()
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(frames)")}
+        for name, column_type in MIGRATIONS.items():
+            if name not in columns:
+                self._db.execute(f"ALTER TABLE frames ADD COLUMN {name} {column_type}")
+
+    def _recover(self) -> None:
+        # spools written before finished rows were deleted still hold them
+        self._db.execute("DELETE FROM frames WHERE state IN (?, ?)", (UPLOADED, EVICTED))
+        self._db.execute("UPDATE frames SET state = ? WHERE state = ?", (PENDING, INFLIGHT))
+        known = {row[0] for row in self._db.execute("SELECT filename FROM frames")}
+        adopted = []
+        for filename in os.listdir(self.root):
+            path = os.path.join(self.root, filename)
+            name, ext = os.path.splitext(filename)
+            if ext == ".tmp":
+                os.remove(path)
+            elif ext.lower() in IMAGE_EXTENSIONS and filename not in known:
+                # frames written by the flat cache, or renamed just before a crash
+                try:
+                    timestamp = float(name.split("_")[0])
+                except ValueError:
+                    timestamp = os.path.getmtime(path)
+                adopted.append((filename, timestamp, os.path.getsize(path)))
+        adopted.sort(key=lambda row: row[1])
+        self._db.executemany("INSERT INTO frames (filename, timestamp, size) VALUES (?, ?, ?)", adopted)
+        for frame_id, filename in self._db.execute("SELECT id, filename FROM frames").fetchall():
+            if not os.path.exists(os.path.join(self.root, filename)):
+                self._db.execute("DELETE FROM frames WHERE id = ?", (frame_id,))
+
+    def _reserve_filename(self, timestamp: float, ext: str) -> str:
+        """A file name no indexed or in-progress frame uses: ``<timestamp><ext>``, or ``<timestamp>_<n><ext>``."""
+        with self._lock:
+            filename, n = f"{timestamp}{ext}", 0
+            while filename in self._reserved or self._db.execute(
+                "SELECT 1 FROM frames WHERE filename = ?", (filename,)
+            ).fetchone():
+                n += 1
+                filename = f"{timestamp}_{n}{ext}"
+            self._reserved.add(filename)
+            return filename
+
+    def put(self, data: bytes, timestamp: float, label: Optional[int] = None, location: Optional[tuple] = None,
+            ext: str = ".jpg", confidence: Optional[float] = None, topk: Optional[list] = None) -> int:
+        filename = self._reserve_filename(timestamp, ext)
+        path = os.path.join(self.root, filename)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError:
+            with self._lock:
+                self._reserved.discard(filename)
+            raise
+        _fsync_dir(self.root)
+
+        lat, lon = location if location else (None, None)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO frames (filename, timestamp, label, lat, lon, size, confidence, topk) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (filename, timestamp, label, lat, lon, len(data), confidence, None if topk is None else json.dumps(topk)),
+            )
+            self._reserved.discard(filename)
+            self._total_bytes += len(data)
+            self._pending += 1
+            self._evict()
+            self._available.notify()
+            return cursor.lastrowid
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            row = None
+            if self.evict_first:
+                placeholders = ",".join("?" * len(self.evict_first))
+                row = self._db.execute(
+                    f"SELECT id, filename, size FROM frames WHERE state = ? AND label IN ({placeholders}) "
+                    "ORDER BY id LIMIT 1",
+                    (PENDING, *self.evict_first),
+                ).fetchone()
+            if row is None:
+                row = self._db.execute(
+                    "SELECT id, filename, size FROM frames WHERE state = ? ORDER BY id LIMIT 1", (PENDING,)
+                ).fetchone()
+            if row is None:
+                return
+            frame_id, filename, size = row
+            self._remove_file(filename)
+            self._db.execute("DELETE FROM frames WHERE id = ?", (frame_id,))
+            self._total_bytes -= size
+            self._pending -= 1
+            self._evicted += 1
+
+    def _remove_file(self, filename: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, filename))
+        except FileNotFoundError:
+            pass
+
+    def claim(self, n: int = 1, timeout: Optional[float] = None) -> list:
+        """Mark up to ``n`` of the oldest pending frames in flight and return them, waiting up to ``timeout``."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                rows = self._db.execute(
+                    "SELECT id, filename, timestamp, label, lat, lon, size, confidence, topk FROM frames "
+                    "WHERE state = ? ORDER BY id LIMIT ?",
+                    (PENDING, n),
+                ).fetchall()
+                if rows:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return []
+                self._available.wait(remaining)
+            self._db.executemany("UPDATE frames SET state = ? WHERE id = ?", [(INFLIGHT, row[0]) for row in rows])
+            self._pending -= len(rows)
+            self._inflight += len(rows)
+        return [FrameRecord(*row, root=self.root) for row in rows]
+
+    def ack(self, record: FrameRecord) -> None:
+        """The frame reached the backend: drop the file and its index row."""
+        with self._lock:
+            self._remove_file(record.filename)
+            self._db.execute("DELETE FROM frames WHERE id = ?", (record.id,))
+            self._total_bytes -= record.size
+            self._inflight -= 1
+            self._uploaded += 1
+
+    def release(self, record: FrameRecord) -> None:
+        """Upload failed: put the frame back in the pending queue at its original position."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE frames SET state = ?, attempts = attempts + 1 WHERE id = ?", (PENDING, record.id)
+            )
+            self._inflight -= 1
+            self._pending += 1
+            self._available.notify()
+
+    def discard(self, record: FrameRecord) -> None:
+        """The frame file is gone: stop trying to upload it."""
+        with self._lock:
+            self._db.execute("DELETE FROM frames WHERE id = ?", (record.id,))
+            self._total_bytes -= record.size
+            self._inflight -= 1
+            self._evicted += 1
+
+    @property
+    def pending(self) -> int:
+        """Frames not uploaded yet, in flight included."""
+        with self._lock:
+            return self._pending + self._inflight
+
+    def stats(self) -> dict:
+        """Frames pending and in flight, and frames uploaded and evicted since the spool was opened."""
+        with self._lock:
+            counts = {PENDING: self._pending, INFLIGHT: self._inflight, UPLOADED: self._uploaded,
+                      EVICTED: self._evicted}
+            total_bytes = self._total_bytes
+        stats = {name: counts[state] for state, name in STATE_NAMES.items()}
+        stats["bytes"] = total_bytes
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._available.notify_all()
+            self._db.close()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the Jetson scripts import each other as top-level modules (``from spool import FrameSpool``)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
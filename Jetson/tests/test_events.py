@@ -0,0 +1,101 @@
+import numpy as np
+
+from events import EventAggregator
+
+FRAME = np.zeros((2, 2, 3), dtype=np.uint8)
+
+
+def _probs(bad):
+    """Two classes, class 1 is the bad-road one."""
+    return np.array([1.0 - bad, bad])
+
+
+def _run(aggregator, bad_values, start=0.0, locations=None):
+    events = []
+    for i, bad in enumerate(bad_values):
+        location = locations[i] if locations is not None else None
+        events += aggregator.update(_probs(bad), FRAME, start + i, location)
+    return events
+
+
+def test_hysteresis_keeps_one_event():
+    aggregator = EventAggregator([1], window=1, on_threshold=0.6, off_threshold=0.4, max_event_seconds=None)
+    # flickers around on_threshold without dropping below off_threshold
+    events = _run(aggregator, [0.1, 0.7, 0.5, 0.65, 0.45, 0.7, 0.1])
+    events += aggregator.flush()
+    assert len(events) == 1
+    assert events[0].num_frames == 5
+    assert events[0].start_time == 1.0 and events[0].end_time == 5.0
+
+
+def test_below_on_threshold_opens_nothing():
+    aggregator = EventAggregator([1], window=1, on_threshold=0.6, off_threshold=0.4)
+    assert _run(aggregator, [0.5, 0.55, 0.5]) == []
+    assert aggregator.flush() == []
+
+
+def test_smoothing_ignores_a_single_spike():
+    aggregator = EventAggregator([1], window=5, on_threshold=0.6, off_threshold=0.4)
+    assert _run(aggregator, [0.0, 0.0, 0.0, 1.0, 0.0, 0.0]) == []
+    assert aggregator.flush() == []
+
+
+def test_nearby_segments_are_merged():
+    aggregator = EventAggregator([1], window=1, merge_gap=5.0, max_event_seconds=None)
+    events = _run(aggregator, [0.9, 0.9, 0.1, 0.1, 0.9, 0.9, 0.1])
+    events += _run(aggregator, [0.1] * 10, start=7.0)
+    assert len(events) == 1
+    assert events[0].num_frames == 4
+    assert events[0].start_time == 0.0 and events[0].end_time == 5.0
+
+
+def test_distant_segments_are_separate_events():
+    aggregator = EventAggregator([1], window=1, merge_gap=2.0, max_event_seconds=None)
+    events = _run(aggregator, [0.9, 0.9, 0.1, 0.1, 0.1, 0.1, 0.9, 0.1])
+    assert len(events) == 1
+    events += aggregator.flush()
+    assert [event.num_frames for event in events] == [2, 1]
+
+
+def test_merge_uses_distance_when_located():
+    aggregator = EventAggregator([1], window=1, merge_distance_m=20.0, max_event_seconds=None)
+    # ~1 m apart, then ~111 m further on: same segment, then a new one
+    locations = [(10.0, 106.0), (10.00001, 106.0), (10.00001, 106.0), (10.001, 106.0), (10.001, 106.0)]
+    events = _run(aggregator, [0.9, 0.1, 0.9, 0.1, 0.1], locations=locations)
+    assert len(events) == 1 and events[0].num_frames == 2
+
+
+def test_event_keeps_its_most_confident_frame():
+    aggregator = EventAggregator([1], window=1, max_event_seconds=None)
+    frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(4)]
+    for i, bad in enumerate([0.7, 0.95, 0.8, 0.1]):
+        aggregator.update(_probs(bad), frames[i], float(i))
+    (event,) = aggregator.flush()
+    assert event.best_timestamp == 1.0
+    assert (event.best_frame == 1).all()
+    assert abs(event.confidence - (0.7 + 0.95 + 0.8) / 3) < 1e-9
+
+
+def test_skipped_frames_repeat_the_last_probabilities():
+    aggregator = EventAggregator([1], window=1, max_event_seconds=None)
+    assert aggregator.update(None, FRAME, 0.0) == []
+    aggregator.update(_probs(0.9), FRAME, 1.0)
+    aggregator.update(None, FRAME, 2.0)
+    (event,) = aggregator.flush()
+    assert event.num_frames == 2
+
+
+def test_long_events_are_split():
+    aggregator = EventAggregator([1], window=1, max_event_seconds=10.0, max_event_distance_m=None)
+    events = _run(aggregator, [0.9] * 25)
+    assert [event.num_frames for event in events] == [11, 11]
+    (rest,) = aggregator.flush()
+    assert rest.num_frames == 3
+
+
+def test_split_continues_above_off_threshold():
+    aggregator = EventAggregator([1], window=1, on_threshold=0.6, off_threshold=0.4, max_event_seconds=2.0)
+    events = _run(aggregator, [0.9, 0.9, 0.9, 0.5, 0.5])
+    assert len(events) == 1
+    (rest,) = aggregator.flush()
+    assert rest.num_frames == 2
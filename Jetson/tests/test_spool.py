@@ -0,0 +1,109 @@
+import os
+
+from spool import FrameSpool
+
+
+def _frames(root):
+    return sorted(name for name in os.listdir(root) if name.endswith(".jpg"))
+
+
+def test_reopen_after_crash(tmp_path):
+    root = str(tmp_path)
+    spool = FrameSpool(root)
+    for i in range(4):
+        spool.put(b"x" * 10, 1000.0 + i, label=1)
+    uploaded, inflight = spool.claim(2)
+    spool.ack(uploaded)
+    # a crash: one frame still in flight, a temporary file left half written,
+    # a frame renamed into place but never indexed, and the spool never closed
+    with open(os.path.join(root, "1100.0.jpg.tmp"), "wb") as f:
+        f.write(b"partial")
+    with open(os.path.join(root, "1200.0.jpg"), "wb") as f:
+        f.write(b"y" * 7)
+
+    reopened = FrameSpool(root)
+    try:
+        stats = reopened.stats()
+        assert stats["pending"] == 4 and stats["inflight"] == 0
+        assert stats["bytes"] == 3 * 10 + 7
+        assert not [name for name in os.listdir(root) if name.endswith(".tmp")]
+        # the frame left in flight is first again, the adopted one last
+        records = reopened.claim(10)
+        assert records[0].filename == inflight.filename
+        assert [r.filename for r in records][-1] == "1200.0.jpg"
+        assert records[-1].timestamp == 1200.0
+    finally:
+        reopened.close()
+        spool.close()
+
+
+def test_reopen_drops_rows_of_missing_files(tmp_path):
+    root = str(tmp_path)
+    spool = FrameSpool(root)
+    spool.put(b"x" * 10, 1000.0)
+    spool.put(b"x" * 10, 1001.0)
+    spool.close()
+    os.remove(os.path.join(root, "1000.0.jpg"))
+
+    spool = FrameSpool(root)
+    try:
+        assert spool.pending == 1
+        assert [r.filename for r in spool.claim(10)] == ["1001.0.jpg"]
+    finally:
+        spool.close()
+
+
+def test_same_timestamp_gets_unique_names(tmp_path):
+    spool = FrameSpool(str(tmp_path))
+    try:
+        for data in (b"a", b"b", b"c"):
+            spool.put(data, 1000.0)
+        assert _frames(tmp_path) == ["1000.0.jpg", "1000.0_1.jpg", "1000.0_2.jpg"]
+        assert spool.pending == 3
+    finally:
+        spool.close()
+
+
+def test_eviction_prefers_evict_first_labels(tmp_path):
+    spool = FrameSpool(str(tmp_path), max_bytes=30, evict_first=(4,))
+    try:
+        spool.put(b"x" * 10, 1000.0, label=0)
+        spool.put(b"x" * 10, 1001.0, label=4)
+        spool.put(b"x" * 10, 1002.0, label=0)
+        spool.put(b"x" * 10, 1003.0, label=0)
+        assert _frames(tmp_path) == ["1000.0.jpg", "1002.0.jpg", "1003.0.jpg"]
+        spool.put(b"x" * 10, 1004.0, label=0)
+        # no "Rain" frame left: the oldest pending one goes
+        assert _frames(tmp_path) == ["1002.0.jpg", "1003.0.jpg", "1004.0.jpg"]
+        stats = spool.stats()
+        assert stats["evicted"] == 2 and stats["pending"] == 3 and stats["bytes"] == 30
+    finally:
+        spool.close()
+
+
+def test_inflight_frames_are_not_evicted(tmp_path):
+    spool = FrameSpool(str(tmp_path), max_bytes=20)
+    try:
+        spool.put(b"x" * 10, 1000.0)
+        (claimed,) = spool.claim(1)
+        spool.put(b"x" * 10, 1001.0)
+        spool.put(b"x" * 10, 1002.0)
+        assert os.path.exists(claimed.path)
+        assert _frames(tmp_path) == ["1000.0.jpg", "1002.0.jpg"]
+    finally:
+        spool.close()
+
+
+def test_release_keeps_the_original_position(tmp_path):
+    spool = FrameSpool(str(tmp_path))
+    try:
+        for i in range(3):
+            spool.put(b"x", 1000.0 + i)
+        first, second = spool.claim(2)
+        spool.release(first)
+        spool.ack(second)
+        assert [r.filename for r in spool.claim(10)] == ["1000.0.jpg", "1002.0.jpg"]
+        assert not os.path.exists(second.path)
+        assert spool.stats()["uploaded"] == 1
+    finally:
+        spool.close()
@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from spool import FrameSpool
+from uploader import Uploader
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        filenames = [name.decode() for name in re.findall(rb'filename="([^"]+)"', body)]
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, filenames))
+            fail = server.fail
+        if fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path.endswith("/upload-images/"):
+            payload = {"results": [{"filename": name, "status": "ok"} for name in filenames]}
+        else:
+            payload = {"filename": filenames[0]}
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local stand-in for the backend: records every request, answers 503 while ``fail`` is set."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.fail = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = FrameSpool(str(tmp_path))
+    yield spool
+    spool.close()
+
+
+def _fill(spool, n):
+    for i in range(n):
+        spool.put(b"frame-%d" % i, 1000.0 + i, label=i % 7, location=(10.0, 106.0))
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _uploader(spool, server, **kwargs):
+    return Uploader(spool, api_url=server.url + "/upload-image/", bulk_api_url=server.url + "/upload-images/",
+                    timeout=5.0, base_backoff=0.01, max_backoff=0.05, **kwargs)
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_uploads_and_acks_every_frame(spool, server, batch_size):
+    _fill(spool, 10)
+    uploader = _uploader(spool, server, num_workers=3, batch_size=batch_size).start()
+    try:
+        _wait_for(lambda: spool.pending == 0)
+    finally:
+        uploader.stop()
+
+    uploaded = sorted(name for _, names in server.requests for name in names)
+    assert len(uploaded) == 10 and len(set(uploaded)) == 10
+    assert uploader.uploaded == 10 and uploader.failed == 0 and uploader.errors == 0
+    assert spool.stats()["uploaded"] == 10
+    assert not [name for name in os.listdir(spool.root) if name.endswith(".jpg")]
+    if batch_size > 1:
+        assert all(path == "/upload-images/" for path, _ in server.requests)
+
+
+def test_failed_uploads_are_released_and_retried(spool, server):
+    server.fail = True
+    _fill(spool, 3)
+    uploader = _uploader(spool, server, num_workers=2).start()
+    try:
+        _wait_for(lambda: uploader.failed >= 3)
+        assert spool.pending == 3
+        server.fail = False
+        _wait_for(lambda: spool.pending == 0)
+    finally:
+        uploader.stop()
+    assert uploader.uploaded == 3
+    assert spool.stats()["inflight"] == 0
+
+
+def test_worker_survives_unexpected_errors(spool, server, monkeypatch):
+    _fill(spool, 2)
+    uploader = _uploader(spool, server, num_workers=1)
+    calls = []
+
+    def flaky_upload(path, metadata=None):
+        calls.append(path)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return Uploader.upload(uploader, path, metadata)
+
+    monkeypatch.setattr(uploader, "upload", flaky_upload)
+    uploader.start()
+    try:
+        _wait_for(lambda: spool.pending == 0)
+    finally:
+        uploader.stop()
+    assert uploader.errors == 1
+    assert uploader.uploaded == 2
+
+
+def test_backoff_is_capped_after_many_failures(spool):
+    uploader = Uploader(spool, api_url="http://127.0.0.1:9/", base_backoff=1.0, max_backoff=60.0)
+    uploader._failures = 5000
+    assert 0.0 <= uploader._backoff_delay() <= 60.0
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import random
+import socket
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from spool import FrameSpool
+
+__all__ = ["Uploader"]
+
+API_URL = "https://projects.iec-uit.com/ResEViTRoad/api/upload-image/"
+BULK_API_URL = "https://projects.iec-uit.com/ResEViTRoad/api/upload-images/"
+
+
+class Uploader:
+    """Upload spooled frames with a pooled HTTP session and a few worker threads.
+
+    Workers block on ``FrameSpool.claim`` and wake up as soon as a frame is
+    spooled, oldest first. Uploaded frames are acknowledged in the spool,
+    failed ones are released back to it. When an upload fails every worker
+    backs off exponentially, with full jitter, until the next success, so a
+    dead link costs no CPU. An unexpected error in a worker is logged and
+    counted in ``errors``, its claimed frames are released and it carries on.
+
+    With ``batch_size > 1`` each worker claims up to that many frames and posts
+    them with their metadata in one request to the bulk endpoint, acking or
+    releasing every frame from the per-item results.
+    """
+
+    def __init__(
+        self,
+        spool: FrameSpool,
+        api_url=API_URL,
+        num_workers=2,
+        batch_size=1,
+        bulk_api_url=BULK_API_URL,
+        device_id=None,
+        timeout=30.0,
+        base_backoff=1.0,
+        max_backoff=60.0,
+    ):
+        self.spool = spool
+        self.api_url = api_url
+        self.batch_size = batch_size
+        self.bulk_api_url = bulk_api_url
+        self.device_id = device_id or socket.gethostname()
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=num_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._threads = []
+
+        self.uploaded = 0
+        self.failed = 0
+        self.errors = 0
+
+    def start(self) -> "Uploader":
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"uploader-{i}", daemon=True) for i in range(self.num_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(self.timeout)
+        self._threads = []
+        self.session.close()
+
+    def drain(self, poll_interval=0.5) -> None:
+        """Block until every spooled frame has been uploaded."""
+        while self.spool.pending > 0:
+            time.sleep(poll_interval)
+
+    def _backoff_delay(self) -> float:
+        # cap the exponent: a link down for hours counts thousands of failures and 2.0 ** 1024 overflows
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** min(self._failures, 20)))
+
+    def _on_result(self, success: bool) -> None:
+        with self._lock:
+            if success:
+                self._failures = 0
+                self._retry_at = 0.0
+            else:
+                self._failures += 1
+                self._retry_at = time.monotonic() + self._backoff_delay()
+
+    def upload(self, file_path: str, metadata: Optional[dict] = None) -> bool:
+        filename = os.path.basename(file_path)
+        data = {"device": self.device_id}
+        if metadata is not None:
+            data["metadata"] = json.dumps(metadata)
+        try:
+            with open(file_path, 'rb') as f:
+                files = {'file': (filename, f, 'image/jpeg')}
+                response = self.session.post(self.api_url, files=files, data=data, timeout=self.timeout)
+            if response.status_code == 200:
+                return True
+            print(f"Failed to upload {filename}: {response.status_code}")
+        except Exception as e:
+            print(f"⚠Error uploading {filename}: {e}")
+        return False
+
+    def upload_batch(self, records: list) -> set:
+        """Post several frames in one request and return the filenames the backend accepted."""
+        handles = []
+        try:
+            files = []
+            for record in records:
+                f = open(record.path, 'rb')
+                handles.append(f)
+                files.append(('files', (record.filename, f, 'image/jpeg')))
+            metadata = [record.metadata for record in records]
+            response = self.session.post(
+                self.bulk_api_url, files=files, data={"metadata": json.dumps(metadata), "device": self.device_id}, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                print(f"Failed to upload a batch of {len(records)}: {response.status_code}")
+                return set()
+            return {item["filename"] for item in response.json()["results"] if item["status"] == "ok"}
+        except Exception as e:
+            print(f"⚠Error uploading a batch of {len(records)}: {e}")
+            return set()
+        finally:
+            for f in handles:
+                f.close()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._step()
+            except Exception as e:
+                # an unexpected error must not end the worker: its frames would stay in flight until a restart
+                with self._lock:
+                    self.errors += 1
+                print(f"⚠Uploader error: {e}")
+                self._stop_event.wait(self.base_backoff)
+
+    def _step(self) -> None:
+        wait = self._retry_at - time.monotonic()
+        if wait > 0:
+            self._stop_event.wait(wait)
+            return
+        claimed = self.spool.claim(self.batch_size, timeout=0.5)
+        # claimed frames neither acked, released nor discarded yet
+        unsettled = list(claimed)
+        try:
+            records = []
+            for record in claimed:
+                if os.path.isfile(record.path):
+                    records.append(record)
+                else:
+                    self.spool.discard(record)
+                    unsettled.remove(record)
+            if not records:
+                return
+            if self.batch_size > 1:
+                accepted = self.upload_batch(records)
+            else:
+                accepted = {records[0].filename} if self.upload(records[0].path, records[0].metadata) else set()
+            self._on_result(len(accepted) > 0)
+            uploaded = 0
+            for record in records:
+                if record.filename in accepted:
+                    self.spool.ack(record)
+                    uploaded += 1
+                else:
+                    self.spool.release(record)
+                unsettled.remove(record)
+        finally:
+            for record in unsettled:
+                self.spool.release(record)
+        with self._lock:
+            # the counters are shared by every worker
+            self.uploaded += uploaded
+            self.failed += len(records) - uploaded
+
+
+if __name__ == '__main__':
+    # drain a cache directory once, e.g. against a local stand-in server
+    parser = argparse.ArgumentParser(description='Upload cached frames')
+    parser.add_argument('--api_url', type=str, default=API_URL, help='Upload endpoint')
+    parser.add_argument('--cache_dir', type=str, default="cache", help='Directory with the cached frames')
+    parser.add_argument('--num_workers', type=int, default=2, help='Number of concurrent uploads')
+    parser.add_argument('--batch_size', type=int, default=1, help='Frames per request, >1 uses the bulk endpoint')
+    parser.add_argument('--bulk_api_url', type=str, default=BULK_API_URL, help='Bulk upload endpoint')
+    args = parser.parse_args()
+    spool = FrameSpool(args.cache_dir)
+    uploader = Uploader(spool, args.api_url, num_workers=args.num_workers, batch_size=args.batch_size,
+                        bulk_api_url=args.bulk_api_url).start()
+    start_time = time.time()
+    uploader.drain()
+    uploader.stop()
+    spool.close()
+    print(f"Uploaded {uploader.uploaded} frames in {time.time() - start_time:.1f}s, {uploader.failed} failed attempts")
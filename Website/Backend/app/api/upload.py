@@ -1,101 +1,227 @@
-from fastapi import APIRouter, File, UploadFile
+from fastapi import APIRouter, File, Form, Header, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, FileResponse
+from typing import List, Optional
+import json
+import math
 import os
-import re
+from app.image_index import IMAGE_EXTENSIONS, MAP_LABEL, ImageIndex, extract_metadata
+from app.thumbnails import INGEST_SIZES, THUMB_SIZES, ensure_thumbnail, thumbnail_etag
 
 router = APIRouter()
 
 UPLOAD_DIR = "uploads"
+CHUNK_SIZE = 1024 * 1024
+# thumbnail được nginx và trình duyệt cache, hết hạn thì kiểm tra lại bằng ETag
+THUMB_CACHE_CONTROL = "public, max-age=86400"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+image_index = ImageIndex(os.path.join(UPLOAD_DIR, "index.db"))
+
+def is_image_name(filename: str) -> bool:
+    # UPLOAD_DIR còn chứa index.db (và -wal/-shm), sidecar .json, file .part:
+    # chỉ nhận và phục vụ file có đuôi ảnh
+    return os.path.basename(filename).lower().endswith(IMAGE_EXTENSIONS)
+
+async def save_upload(file: UploadFile) -> str:
+    # Ghi file theo từng chunk vào file tạm rồi đổi tên, không đọc cả file vào RAM
+    filename = os.path.basename(file.filename)
+    file_location = os.path.join(UPLOAD_DIR, filename)
+    tmp_location = file_location + ".part"
+    with open(tmp_location, "wb") as f:
+        while chunk := await file.read(CHUNK_SIZE):
+            f.write(chunk)
+    os.replace(tmp_location, file_location)
+    return filename
+
+def save_metadata(filename: str, metadata: dict) -> None:
+    with open(os.path.join(UPLOAD_DIR, filename + ".json"), "w") as f:
+        json.dump(metadata, f)
+
+def index_upload(filename: str, metadata: Optional[dict] = None, device: Optional[str] = None) -> None:
+    # Đọc metadata một lần lúc upload, list-images chỉ đọc từ index
+    image_index.add(extract_metadata(os.path.join(UPLOAD_DIR, filename), metadata, device))
+    # thumbnail cho lưới ảnh được tạo sẵn, các kích thước khác tạo khi cần
+    for size in INGEST_SIZES:
+        try:
+            ensure_thumbnail(UPLOAD_DIR, filename, size)
+        except Exception as e:
+            print(f"Cannot make {size} thumbnail of {filename}: {e}")
 
 @router.post("/upload-image/")
-async def upload_image(file: UploadFile = File(...)):
-    if not file.content_type.startswith("image/"):
+async def upload_image(
+    file: UploadFile = File(...),
+    device: Optional[str] = Form(None),
+    metadata: Optional[str] = Form(None),
+):
+    """``metadata`` (tuỳ chọn) là JSON object: timestamp, label, location, confidence, topk."""
+    if not file.content_type.startswith("image/") or not is_image_name(file.filename):
         return JSONResponse(status_code=400, content={"error": "File is not an image."})
-    file_location = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as f:
-        f.write(await file.read())
-    return {"filename": file.filename, "message": "Upload successful"}
+    item_metadata = None
+    if metadata:
+        try:
+            item_metadata = json.loads(metadata)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "metadata is not valid JSON."})
+        if not isinstance(item_metadata, dict):
+            return JSONResponse(status_code=400, content={"error": "metadata must be a JSON object."})
+    filename = await save_upload(file)
+    if item_metadata:
+        save_metadata(filename, item_metadata)
+    # đọc EXIF và tạo thumbnail chặn CPU, chạy trong threadpool để không chặn event loop
+    await run_in_threadpool(index_upload, filename, item_metadata, device)
+    return {"filename": filename, "message": "Upload successful"}
+
+@router.post("/upload-images/")
+async def upload_images(
+    files: List[UploadFile] = File(...),
+    metadata: Optional[str] = Form(None),
+    device: Optional[str] = Form(None),
+):
+    """Bulk ingest: nhiều ảnh trong một request, trả về kết quả cho từng ảnh.
+
+    ``metadata`` (tuỳ chọn) là một JSON list cùng thứ tự với ``files``.
+    """
+    items_metadata = [None] * len(files)
+    if metadata:
+        try:
+            items_metadata = json.loads(metadata)
+        except ValueError:
+            return JSONResponse(status_code=400, content={"error": "metadata is not valid JSON."})
+        if not isinstance(items_metadata, list) or len(items_metadata) != len(files):
+            return JSONResponse(status_code=400, content={"error": "metadata must be a list with one entry per file."})
+
+    results = []
+    for file, item_metadata in zip(files, items_metadata):
+        if not file.content_type.startswith("image/") or not is_image_name(file.filename):
+            results.append({"filename": file.filename, "status": "error", "error": "File is not an image."})
+            continue
+        try:
+            filename = await save_upload(file)
+            if item_metadata:
+                save_metadata(filename, item_metadata)
+            await run_in_threadpool(index_upload, filename, item_metadata, device)
+            results.append({"filename": filename, "status": "ok"})
+        except Exception as e:
+            results.append({"filename": file.filename, "status": "error", "error": str(e)})
+    return {"results": results}
+
+def to_response(row: dict) -> dict:
+    prediction = row["prediction"]
+    return {
+        "filename": row["filename"],
+        "url": f"/get-image/{row['filename']}",
+        "thumbnail_url": f"/thumb/{row['filename']}",
+        "metadata": {
+            "Prediction": MAP_LABEL.get(prediction) if prediction is not None else None,
+            "Location": row["location"],
+            "Confidence": row["confidence"],
+        },
+    }
+
+LABEL_IDS = {name.lower(): label for label, name in MAP_LABEL.items()}
+
+def parse_labels(label: Optional[str]) -> Optional[list]:
+    # label có thể là tên ("Rain") hoặc id ("4"), nhiều giá trị cách nhau bởi dấu phẩy
+    if not label:
+        return None
+    labels = []
+    for item in label.split(","):
+        item = item.strip()
+        if item.isdigit():
+            labels.append(int(item))
+        elif item.lower() in LABEL_IDS:
+            labels.append(LABEL_IDS[item.lower()])
+        else:
+            raise ValueError(f"Unknown label: {item}")
+    return labels
+
+def encode_cursor(row: dict) -> str:
+    return f"{row['timestamp']!r}:{row['filename']}"
+
+def decode_cursor(cursor: str) -> tuple:
+    # cursor do client gửi lại: sai định dạng thì báo "invalid cursor", không lộ lỗi parse
+    try:
+        timestamp, filename = cursor.split(":", 1)
+        timestamp = float(timestamp)
+    except ValueError:
+        raise ValueError("invalid cursor") from None
+    if not math.isfinite(timestamp):
+        raise ValueError("invalid cursor")
+    return timestamp, filename
 
 @router.get("/list-images/")
-async def list_images():
+async def list_images(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    label: Optional[str] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    min_lat: Optional[float] = None,
+    min_lon: Optional[float] = None,
+    max_lat: Optional[float] = None,
+    max_lon: Optional[float] = None,
+    search: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+):
+    """Danh sách ảnh theo trang, lọc và sắp xếp trên index.
+
+    Không truyền ``limit`` thì trả về toàn bộ danh sách như trước (Dashboard cần cho thống kê).
+    """
+    bbox_values = (min_lat, min_lon, max_lat, max_lon)
+    if any(v is not None for v in bbox_values) and any(v is None for v in bbox_values):
+        return JSONResponse(status_code=400, content={"error": "Bounding box needs min_lat, min_lon, max_lat and max_lon."})
     try:
-        files = os.listdir(UPLOAD_DIR)
-        image_files = [f for f in files if f.lower().endswith((".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"))]
-        result = []
-        from PIL import Image
-        import piexif
-        for filename in image_files:
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            metadata = {}
-            comments = None
-            try:
-                with Image.open(file_path) as img:
-                    exif_data = img.info.get('exif')
-                    if exif_data:
-                        exif_dict = piexif.load(exif_data)
-                        def decode_exif(exif):
-                            result = {}
-                            for ifd in exif:
-                                if isinstance(exif[ifd], dict):
-                                    for tag, value in exif[ifd].items():
-                                        tag_name = piexif.TAGS[ifd][tag]["name"] if tag in piexif.TAGS[ifd] else str(tag)
-                                        if isinstance(value, bytes):
-                                            try:
-                                                value = value.decode('utf-8', errors='ignore')
-                                            except Exception:
-                                                value = str(value)
-                                        result[f"{ifd}:{tag_name}"] = value
-                            return result
-                        full_metadata = decode_exif(exif_dict)
-                        # Xử lý giá trị Predict và location cho đúng, loại bỏ tiền tố 'ASCII\x00\x00\x00' nếu có
-                        def clean_text(val):
-                            if isinstance(val, str):
-                                return val.replace('ASCII\x00\x00\x00', '').replace('ASCII\x00', '').strip()
-                            return val
-                        predict_raw = clean_text(full_metadata.get('0th:ImageDescription')) or clean_text(full_metadata.get('Exif:UserComment'))
-                        location = None
-                        if predict_raw and isinstance(predict_raw, str):
-                          
-                            import re
-                            # Tách Prediction và Location từ chuỗi predict_raw
-                            match = re.search(r'Prediction:\s*(\d+)', predict_raw)
-                            if match:
-                                prediction = int(match.group(1))
-                            match_loc = re.search(r'Location:\s*([\(\)\d\.,\s]+)', predict_raw)
-                            if match_loc:
-                                location = match_loc.group(1).strip()
-                        else: print(full_metadata)
-                        map_label={
-                            0: "Asphalt bad",
-                            1: "Good road",
-                            2: "Paved bad",
-                            3: "Paved good",
-                            4: "Rain",
-                            5: "Unpaved bad",
-                            6: "Unpaved good",
-                        }
-                        metadata = {
-                            "Prediction": map_label[prediction],
-                            "Location": location
-                        }
-                    else:
-                        metadata = {"Predict": None, "location": None}
-            except Exception as e:
-                metadata = {"Predict": None, "location": None, "error": str(e)}
-            result.append({
-                "filename": filename,
-                "url": f"/get-image/{filename}",
-                "metadata": metadata,
-            })
-        return {"images": result}
+        labels = parse_labels(label)
+        page_cursor = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    try:
+        # truy vấn sqlite là blocking, chạy trong threadpool để không chặn event loop khi đang index upload
+        rows, total = await run_in_threadpool(
+            image_index.query,
+            labels=labels,
+            start_time=start_time,
+            end_time=end_time,
+            bbox=bbox_values if bbox_values[0] is not None else None,
+            search=search,
+            min_confidence=min_confidence,
+            order=order,
+            offset=offset,
+            limit=limit,
+            cursor=page_cursor,
+        )
+        next_cursor = encode_cursor(rows[-1]) if limit is not None and len(rows) == limit else None
+        return {"images": [to_response(row) for row in rows], "total": total, "next_cursor": next_cursor}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 # Raw image serving endpoint (giữ endpoint cũ để trả file ảnh trực tiếp)
 @router.get("/get-image/{filename}")
 async def get_image_raw(filename: str):
+    filename = os.path.basename(filename)
+    file_path = os.path.join(UPLOAD_DIR, filename)
+    if not is_image_name(filename) or not os.path.isfile(file_path):
+        return JSONResponse(status_code=404, content={"error": "File not found."})
+    return FileResponse(file_path)
+
+@router.get("/thumb/{filename}")
+async def get_thumbnail(
+    filename: str,
+    size: str = Query("small", pattern=f"^({'|'.join(THUMB_SIZES)})$"),
+    if_none_match: Optional[str] = Header(None),
+):
+    filename = os.path.basename(filename)
     file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    if not is_image_name(filename) or not os.path.isfile(file_path):
         return JSONResponse(status_code=404, content={"error": "File not found."})
-    return FileResponse(file_path)
\ No newline at end of file
+    etag = thumbnail_etag(file_path, size)
+    headers = {"ETag": etag, "Cache-Control": THUMB_CACHE_CONTROL}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    try:
+        thumb_path = await run_in_threadpool(ensure_thumbnail, UPLOAD_DIR, filename, size)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    return FileResponse(thumb_path, media_type="image/jpeg", headers=headers)
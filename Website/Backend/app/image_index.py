@@ -0,0 +1,259 @@
+"""Chỉ mục metadata ảnh (SQLite), được ghi một lần lúc upload.
+
+Index lại các ảnh đã có trong thư mục uploads (chạy một lần, từ thư mục Backend):
+
+    python -m app.image_index --upload-dir uploads
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Optional
+
+import piexif
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp")
+
+MAP_LABEL = {
+    0: "Asphalt bad",
+    1: "Good road",
+    2: "Paved bad",
+    3: "Paved good",
+    4: "Rain",
+    5: "Unpaved bad",
+    6: "Unpaved good",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    filename TEXT PRIMARY KEY,
+    prediction INTEGER,
+    location TEXT,
+    lat REAL,
+    lon REAL,
+    timestamp REAL NOT NULL,
+    size INTEGER NOT NULL,
+    device TEXT,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS images_timestamp_filename ON images (timestamp, filename);
+CREATE INDEX IF NOT EXISTS images_prediction_timestamp ON images (prediction, timestamp);
+CREATE INDEX IF NOT EXISTS images_lat_lon ON images (lat, lon);
+"""
+
+COLUMNS = ("filename", "prediction", "location", "lat", "lon", "timestamp", "size", "device", "confidence")
+# cột được thêm sau, tạo thêm trên các index cũ
+MIGRATIONS = {"confidence": "REAL"}
+
+
+def clean_text(val):
+    # loại bỏ tiền tố 'ASCII\x00\x00\x00' của UserComment nếu có
+    if isinstance(val, bytes):
+        val = val.decode("utf-8", errors="ignore")
+    if isinstance(val, str):
+        return val.replace("ASCII\x00\x00\x00", "").replace("ASCII\x00", "").strip()
+    return val
+
+
+def read_exif_comment(file_path: str) -> Optional[str]:
+    with Image.open(file_path) as img:
+        exif_data = img.info.get("exif")
+    if not exif_data:
+        return None
+    exif_dict = piexif.load(exif_data)
+    comment = clean_text(exif_dict.get("0th", {}).get(piexif.ImageIFD.ImageDescription))
+    return comment or clean_text(exif_dict.get("Exif", {}).get(piexif.ExifIFD.UserComment))
+
+
+def parse_comment(comment: str) -> tuple:
+    """Tách Prediction và Location từ chuỗi 'Prediction: 0, Location: (lat, lon)'."""
+    prediction, location = None, None
+    match = re.search(r"Prediction:\s*(\d+)", comment)
+    if match:
+        prediction = int(match.group(1))
+    match_loc = re.search(r"Location:\s*([\(\)\d\.,\s-]+)", comment)
+    if match_loc:
+        location = match_loc.group(1).strip() or None
+    return prediction, location
+
+
+def parse_location(location: Optional[str]) -> tuple:
+    match = re.search(r"\(\s*([-\d\.]+)\s*,\s*([-\d\.]+)\s*\)", location or "")
+    if not match:
+        return None, None
+    return float(match.group(1)), float(match.group(2))
+
+
+def read_sidecar(file_path: str) -> Optional[dict]:
+    sidecar_path = file_path + ".json"
+    if not os.path.exists(sidecar_path):
+        return None
+    with open(sidecar_path) as f:
+        return json.load(f)
+
+
+def extract_metadata(file_path: str, metadata: Optional[dict] = None, device: Optional[str] = None) -> dict:
+    """Đọc metadata của một ảnh: ưu tiên metadata gửi kèm (hoặc file sidecar .json), sau đó tới EXIF."""
+    filename = os.path.basename(file_path)
+    metadata = metadata or read_sidecar(file_path) or {}
+    prediction = metadata.get("label")
+    location = metadata.get("location")
+    if isinstance(location, (list, tuple)) and len(location) == 2:
+        location = f"({location[0]}, {location[1]})"
+
+    if prediction is None:
+        try:
+            comment = read_exif_comment(file_path)
+        except Exception:
+            comment = None
+        if comment:
+            prediction, exif_location = parse_comment(comment)
+            location = location or exif_location
+
+    timestamp = metadata.get("timestamp")
+    if timestamp is None:
+        # ảnh từ thiết bị được đặt tên theo thời điểm chụp
+        try:
+            timestamp = float(os.path.splitext(filename)[0])
+        except ValueError:
+            timestamp = os.path.getmtime(file_path)
+
+    lat, lon = parse_location(location)
+    return {
+        "filename": filename,
+        "prediction": prediction,
+        "location": location,
+        "lat": lat,
+        "lon": lon,
+        "timestamp": float(timestamp),
+        "size": os.path.getsize(file_path),
+        "device": device or metadata.get("device"),
+        "confidence": metadata.get("confidence"),
+    }
+
+
+class ImageIndex:
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(images)")}
+        for name, column_type in MIGRATIONS.items():
+            if name not in columns:
+                self._db.execute(f"ALTER TABLE images ADD COLUMN {name} {column_type}")
+
+    def add(self, row: dict) -> None:
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO images ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                tuple(row[key] for key in COLUMNS),
+            )
+
+    def add_many(self, rows: list) -> None:
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO images ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[key] for key in COLUMNS) for row in rows],
+            )
+            self._db.execute("COMMIT")
+
+    def filenames(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT filename FROM images")}
+
+    def query(
+        self,
+        labels: Optional[list] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        bbox: Optional[tuple] = None,
+        search: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        cursor: Optional[tuple] = None,
+    ) -> tuple:
+        """Trả về (một trang ảnh, tổng số ảnh khớp bộ lọc).
+
+        ``bbox`` là (min_lat, min_lon, max_lat, max_lon). ``min_confidence`` bỏ
+        qua cả những ảnh không có độ tin cậy (ảnh cũ). ``cursor`` là
+        (timestamp, filename) của ảnh cuối trang trước; khi có cursor thì
+        ``offset`` bị bỏ qua và trang được lấy trực tiếp qua index thời gian.
+        """
+        where, params = [], []
+        if labels:
+            where.append(f"prediction IN ({', '.join('?' * len(labels))})")
+            params.extend(labels)
+        if start_time is not None:
+            where.append("timestamp >= ?")
+            params.append(start_time)
+        if end_time is not None:
+            where.append("timestamp <= ?")
+            params.append(end_time)
+        if bbox is not None:
+            where.append("lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?")
+            params.extend([bbox[0], bbox[2], bbox[1], bbox[3]])
+        if search:
+            where.append("filename LIKE ?")
+            params.append(f"%{search}%")
+        if min_confidence is not None:
+            where.append("confidence >= ?")
+            params.append(min_confidence)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        direction = "ASC" if order == "asc" else "DESC"
+        page_where, page_params = list(where), list(params)
+        if cursor is not None:
+            op = ">" if direction == "ASC" else "<"
+            page_where.append(f"(timestamp, filename) {op} (?, ?)")
+            page_params.extend(cursor)
+            offset = 0
+        page_where_sql = f"WHERE {' AND '.join(page_where)}" if page_where else ""
+        limit_sql = ""
+        if limit is not None:
+            limit_sql = "LIMIT ? OFFSET ?"
+            page_params.extend([limit, offset])
+
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM images {where_sql}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT * FROM images {page_where_sql} "
+                f"ORDER BY timestamp {direction}, filename {direction} {limit_sql}",
+                page_params,
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def list(self) -> list:
+        return self.query()[0]
+
+
+def backfill(index: ImageIndex, upload_dir: str, reindex: bool = False) -> int:
+    known = set() if reindex else index.filenames()
+    rows = []
+    for filename in os.listdir(upload_dir):
+        if filename in known or not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        try:
+            rows.append(extract_metadata(os.path.join(upload_dir, filename)))
+        except Exception as e:
+            print(f"Cannot index {filename}: {e}")
+    index.add_many(rows)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index existing uploads")
+    parser.add_argument("--upload-dir", type=str, default="uploads")
+    parser.add_argument("--reindex", action="store_true", help="Re-read metadata of already indexed images")
+    args = parser.parse_args()
+    count = backfill(ImageIndex(os.path.join(args.upload_dir, "index.db")), args.upload_dir, args.reindex)
+    print(f"Indexed {count} images")
@@ -0,0 +1,92 @@
+"""Ảnh thu nhỏ (thumbnail) lưu trên đĩa, tạo lúc upload hoặc lần đầu được yêu cầu.
+
+Thumbnail nằm ở ``<upload_dir>/thumbs/<size>/<filename>``. Tạo lại toàn bộ
+(chạy từ thư mục Backend):
+
+    python -m app.thumbnails --upload-dir uploads
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+from app.image_index import IMAGE_EXTENSIONS
+
+# cạnh dài nhất (pixel) của từng kích thước
+THUMB_SIZES = {
+    "small": 400,
+    "medium": 1280,
+}
+INGEST_SIZES = ("small",)
+JPEG_QUALITY = 80
+# tăng khi đổi cách tạo thumbnail để ETag cũ hết hiệu lực
+THUMB_VERSION = 1
+
+
+def thumbnail_path(upload_dir: str, filename: str, size: str) -> str:
+    return os.path.join(upload_dir, "thumbs", size, os.path.basename(filename))
+
+
+def make_thumbnail(src_path: str, dst_path: str, max_side: int) -> None:
+    with Image.open(src_path) as img:
+        # JPEG được giải mã thẳng ở độ phân giải thấp hơn, không cần decode cả ảnh gốc
+        img.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        # tên file tạm riêng cho mỗi lần tạo: nhiều request cùng lúc cho cùng thumbnail
+        # không ghi chung một file, request nào đổi tên xong trước thì thắng
+        fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(dst_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def ensure_thumbnail(upload_dir: str, filename: str, size: str) -> str:
+    """Trả về đường dẫn thumbnail, tạo mới nếu chưa có hoặc cũ hơn ảnh gốc."""
+    src_path = os.path.join(upload_dir, os.path.basename(filename))
+    dst_path = thumbnail_path(upload_dir, filename, size)
+    try:
+        up_to_date = os.path.getmtime(dst_path) >= os.path.getmtime(src_path)
+    except OSError:
+        up_to_date = False
+    if not up_to_date:
+        make_thumbnail(src_path, dst_path, THUMB_SIZES[size])
+    return dst_path
+
+
+def thumbnail_etag(src_path: str, size: str) -> str:
+    # ETag mạnh suy ra từ ảnh gốc: đổi ảnh gốc (mtime/size) hoặc cách tạo thumbnail thì đổi ETag
+    stat = os.stat(src_path)
+    key = f"{os.path.basename(src_path)}:{size}:{stat.st_mtime_ns}:{stat.st_size}:{THUMB_VERSION}"
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+def generate_all(upload_dir: str, sizes=tuple(THUMB_SIZES)) -> int:
+    count = 0
+    for filename in os.listdir(upload_dir):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        for size in sizes:
+            try:
+                ensure_thumbnail(upload_dir, filename, size)
+                count += 1
+            except Exception as e:
+                print(f"Cannot make {size} thumbnail of {filename}: {e}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate thumbnails for existing uploads")
+    parser.add_argument("--upload-dir", type=str, default="uploads")
+    parser.add_argument("--sizes", type=str, nargs="+", default=list(THUMB_SIZES), choices=list(THUMB_SIZES))
+    args = parser.parse_args()
+    print(f"Generated {generate_all(args.upload_dir, args.sizes)} thumbnails")
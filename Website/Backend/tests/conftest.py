@@ -0,0 +1,5 @@
+import os
+import sys
+
+# chạy pytest từ đâu cũng import được package app như khi chạy uvicorn trong thư mục Backend
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
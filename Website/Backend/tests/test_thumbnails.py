@@ -0,0 +1,73 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # app.api.upload tạo thư mục uploads và index.db theo thư mục hiện tại lúc import
+    monkeypatch.chdir(tmp_path)
+    from app.api import upload
+
+    upload_dir = str(tmp_path / "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    monkeypatch.setattr(upload, "UPLOAD_DIR", upload_dir)
+    app = FastAPI()
+    app.include_router(upload.router)
+    with TestClient(app) as client:
+        client.upload_dir = upload_dir
+        yield client
+
+
+def _save_image(path, color, size=(800, 600)):
+    Image.new("RGB", size, color).save(path, format="JPEG")
+
+
+def test_thumbnail_is_generated_with_etag(client):
+    _save_image(os.path.join(client.upload_dir, "a.jpg"), "red")
+    response = client.get("/thumb/a.jpg")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+    assert max(Image.open(os.path.join(client.upload_dir, "thumbs", "small", "a.jpg")).size) == 400
+
+
+def test_matching_etag_returns_304(client):
+    _save_image(os.path.join(client.upload_dir, "a.jpg"), "red")
+    etag = client.get("/thumb/a.jpg").headers["etag"]
+    response = client.get("/thumb/a.jpg", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    # danh sách nhiều ETag, chỉ cần một cái khớp
+    response = client.get("/thumb/a.jpg", headers={"If-None-Match": f'"other", {etag}'})
+    assert response.status_code == 304
+
+
+def test_etag_changes_with_size_and_source(client):
+    path = os.path.join(client.upload_dir, "a.jpg")
+    _save_image(path, "red")
+    small = client.get("/thumb/a.jpg").headers["etag"]
+    medium = client.get("/thumb/a.jpg", params={"size": "medium"}).headers["etag"]
+    assert small != medium
+
+    _save_image(path, "blue", size=(640, 480))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    response = client.get("/thumb/a.jpg", headers={"If-None-Match": small})
+    assert response.status_code == 200
+    assert response.headers["etag"] != small
+    # ảnh gốc mới hơn thumbnail cũ: thumbnail được tạo lại
+    assert Image.open(os.path.join(client.upload_dir, "thumbs", "small", "a.jpg")).size == (400, 300)
+
+
+def test_unknown_or_non_image_files_are_not_served(client):
+    with open(os.path.join(client.upload_dir, "a.jpg.json"), "w") as f:
+        f.write("{}")
+    assert client.get("/thumb/missing.jpg").status_code == 404
+    assert client.get("/thumb/a.jpg.json").status_code == 404
+    assert client.get("/thumb/a.jpg", params={"size": "huge"}).status_code == 422
@@ -45,11 +45,12 @@ const getPredictionTextColor = (prediction: string) => {
 
 export default function ImageManagement() {
   const [images, setImages] = useState<ImageItem[]>([]);
-  const [filteredImages, setFilteredImages] = useState<ImageItem[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
   const [selectedImage, setSelectedImage] = useState<ImageItem | null>(null);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState<string>("");
+  const [debouncedSearch, setDebouncedSearch] = useState<string>("");
   const [showFilters, setShowFilters] = useState<boolean>(false);
   const [startDate, setStartDate] = useState<string>("");
   const [endDate, setEndDate] = useState<string>("");
@@ -57,15 +58,42 @@ export default function ImageManagement() {
   const [refreshTrigger, setRefreshTrigger] = useState<number>(0);
   const imagesPerPage = 8;
 
-  // Fetch images on component mount
+  // Wait for the user to stop typing before querying the server
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  // Go back to the first page whenever the filters change
+  useEffect(() => {
+    setCurrentPage(1);
+  }, [debouncedSearch, startDate, endDate]);
+
+  // Fetch only the current page; filtering and sorting (newest first) are done by the server
   useEffect(() => {
     async function fetchImages() {
       setLoading(true);
       try {
-        const res = await axiosRequest.get("list-images/");
-        const imageList = Array.isArray(res.data.images) ? res.data.images : [];
-        setImages(imageList);
-        setFilteredImages(imageList);
+        const params: Record<string, string | number> = {
+          offset: (currentPage - 1) * imagesPerPage,
+          limit: imagesPerPage,
+        };
+        if (debouncedSearch) {
+          params.search = debouncedSearch;
+        }
+        if (startDate) {
+          const startOfDay = new Date(startDate);
+          startOfDay.setHours(0, 0, 0, 0);
+          params.start_time = startOfDay.getTime() / 1000;
+        }
+        if (endDate) {
+          const endOfDay = new Date(endDate);
+          endOfDay.setHours(23, 59, 59, 999);
+          params.end_time = endOfDay.getTime() / 1000;
+        }
+        const res = await axiosRequest.get("list-images/", { params });
+        setImages(Array.isArray(res.data.images) ? res.data.images : []);
+        setTotal(typeof res.data.total === "number" ? res.data.total : 0);
       } catch (error) {
         console.error("Error loading image list:", error);
         setError("Failed to load images. Please try again later.");
@@ -75,115 +103,39 @@ export default function ImageManagement() {
     }
 
     fetchImages();
-  }, [refreshTrigger]);
+  }, [currentPage, debouncedSearch, startDate, endDate, refreshTrigger]);
 
   // Handle refresh data
   const handleRefresh = () => {
+    setError(null);
     setRefreshTrigger(prev => prev + 1);
   };
 
-  // Parse timestamp from filename format
-  const parseTimestamp = (filename: string): Date | null => {
-    try {
-      const timestampStr = timestampToDate(filename);
-      if (!timestampStr) return null;
-      
-      const [timePart, datePart] = timestampStr.split(' ');
-      if (!datePart) return null;
-      
-      const [day, month, year] = datePart.split('/').map(num => parseInt(num, 10));
-      const [hours, minutes, seconds] = timePart.split(':').map(num => parseInt(num, 10));
-
-      return new Date(year, month - 1, day, hours, minutes, seconds);
-    } catch (error) {
-      console.error("Error parsing timestamp:", error);
-      return null;
-    }
-  };
-
-  // Helper function to check if date is within range
-  const isDateInRange = (filename: string): boolean => {
-    if (!startDate && !endDate) return true;
-    
-    const date = parseTimestamp(filename);
-    if (!date) return true;
-    
-    const start = startDate ? new Date(startDate) : null;
-    const end = endDate ? new Date(endDate) : null;
-    
-    if (start) {
-      const startOfDay = new Date(start);
-      startOfDay.setHours(0, 0, 0, 0);
-      if (date < startOfDay) return false;
-    }
-    
-    if (end) {
-      const endOfDay = new Date(end);
-      endOfDay.setHours(23, 59, 59, 999);
-      if (date > endOfDay) return false;
-    }
-    
-    return true;
-  };
-
-  const sortImagesByTimestamp = (imageList: ImageItem[]): ImageItem[] => {
-    return [...imageList].sort((a, b) => {
-      const dateA = parseTimestamp(a.filename);
-      const dateB = parseTimestamp(b.filename);
-      
-      if (dateA && dateB) {
-        return dateB.getTime() - dateA.getTime();
-      }
-      
-      if (dateA && !dateB) return -1;
-      if (!dateA && dateB) return 1;
-      
-      return a.filename.localeCompare(b.filename);
-    });
-  };
-
-  // Filter images based on search term and date range
-  useEffect(() => {
-    let results = [...images];
-
-    if (searchTerm) {
-      results = results.filter((img) =>
-        img.filename.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-    if (startDate || endDate) {
-      results = results.filter((img) => isDateInRange(img.filename));
-    }
-
-    results = sortImagesByTimestamp(results);
-    setFilteredImages(results);
-    setCurrentPage(1); 
-  }, [searchTerm, startDate, endDate, images]);
-
   const isDateFilterActive = startDate || endDate;
 
-  const indexOfLastImage = currentPage * imagesPerPage;
-  const indexOfFirstImage = indexOfLastImage - imagesPerPage;
-  const currentImages = filteredImages.slice(
-    indexOfFirstImage,
-    indexOfLastImage
-  );
-  const totalPages = Math.ceil(filteredImages.length / imagesPerPage);
+  const totalImages = total ?? 0;
+  const totalPages = Math.ceil(totalImages / imagesPerPage);
 
   const getImageUrl = (filename: string) => {
     return `${axiosRequest.defaults.baseURL}get-image/${filename}`;
   };
 
+  // Downscaled copies served by the backend, the original is only opened on demand
+  const getThumbnailUrl = (filename: string, size: "small" | "medium" = "small") => {
+    return `${axiosRequest.defaults.baseURL}thumb/${filename}?size=${size}`;
+  };
+
   const paginate = (pageNumber: number) => {
     if (pageNumber > 0 && pageNumber <= totalPages) {
       setCurrentPage(pageNumber);
     }
   };
 
+  // Browse within the loaded page
   const navigateImages = (direction: "prev" | "next") => {
     if (!selectedImage) return;
 
-    const currentIndex = filteredImages.findIndex(
+    const currentIndex = images.findIndex(
       (img) => img.filename === selectedImage.filename
     );
     if (currentIndex === -1) return;
@@ -191,13 +143,13 @@ export default function ImageManagement() {
     let newIndex;
     if (direction === "prev") {
       newIndex =
-        currentIndex > 0 ? currentIndex - 1 : filteredImages.length - 1;
+        currentIndex > 0 ? currentIndex - 1 : images.length - 1;
     } else {
       newIndex =
-        currentIndex < filteredImages.length - 1 ? currentIndex + 1 : 0;
+        currentIndex < images.length - 1 ? currentIndex + 1 : 0;
     }
 
-    setSelectedImage(filteredImages[newIndex]);
+    setSelectedImage(images[newIndex]);
   };
 
   // Reset all filters
@@ -220,7 +172,7 @@ export default function ImageManagement() {
     return "";
   };
 
-  if (loading) {
+  if (loading && total === null) {
     return (
       <div className="flex items-center justify-center h-screen ">
         <div className="text-center">
@@ -258,8 +210,8 @@ export default function ImageManagement() {
               Image Analysis Dashboard
             </h1>
             <p className="text-gray-500 mt-1">
-              {filteredImages.length} image
-              {filteredImages.length !== 1 ? "s" : ""} available for analysis
+              {totalImages} image
+              {totalImages !== 1 ? "s" : ""} available for analysis
               <span className="text-xs ml-2 bg-blue-100 text-blue-800 px-2 py-0.5 rounded">
                 Sorted by newest first
               </span>
@@ -357,9 +309,9 @@ export default function ImageManagement() {
       </div>
 
       {/* Image Grid */}
-      {filteredImages.length > 0 ? (
+      {images.length > 0 ? (
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-          {currentImages.map((img, index) => (
+          {images.map((img, index) => (
             <div
               key={index}
               onClick={() => setSelectedImage(img)}
@@ -367,8 +319,9 @@ export default function ImageManagement() {
             >
               <div className="h-48 relative overflow-hidden">
                 <img
-                  src={getImageUrl(img.filename)}
+                  src={getThumbnailUrl(img.filename)}
                   alt={img.filename}
+                  loading="lazy"
                   className="w-full h-full object-cover"
                 />
                 {img.metadata?.Prediction && (
@@ -477,7 +430,7 @@ export default function ImageManagement() {
       )}
 
       {/* Pagination */}
-      {filteredImages.length > 0 && (
+      {images.length > 0 && (
         <div className="mt-8 flex justify-center">
           <nav className="flex items-center space-x-1">
             <button
@@ -574,11 +527,18 @@ export default function ImageManagement() {
             <div className="flex flex-col md:flex-row h-full overflow-hidden">
               {/* Image container */}
               <div className="relative flex-1 bg-gray-900 flex items-center justify-center min-h-[300px]">
-                <img
-                  src={getImageUrl(selectedImage.filename)}
-                  alt={selectedImage.filename}
-                  className="max-w-full max-h-[70vh] object-contain"
-                />
+                <a
+                  href={getImageUrl(selectedImage.filename)}
+                  target="_blank"
+                  rel="noreferrer"
+                  title="Open original"
+                >
+                  <img
+                    src={getThumbnailUrl(selectedImage.filename, "medium")}
+                    alt={selectedImage.filename}
+                    className="max-w-full max-h-[70vh] object-contain"
+                  />
+                </a>
 
                 {/* Navigation buttons */}
                 <button